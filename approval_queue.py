@@ -0,0 +1,133 @@
+from data_cache import DATA_CACHE
+from dataframe import data_version
+
+STATUS_APROVADO = "Aprovado"
+STATUS_NAO_APROVADO = "Não aprovado"
+
+# Colunas usadas na aprovação em lote, por método de aprovação
+FILTER_COLUMNS = {
+    'Nome_Produto2': ['Setor', 'Classificacao ABC', 'Criticidade'],
+    'Setor': ['Setor'],
+}
+
+# Tipo do item nas requisições enviadas ao ERP
+ITEM_TYPES = {'Nome_Produto2': 'Produto', 'Setor': 'Setor'}
+
+
+class ApprovalIndex:
+    """ Itens a aprovar (produtos ou setores) com a sugestão de compra e os grupos por filtro pré-calculados.
+
+    É somente leitura e compartilhado entre as sessões; o progresso de cada sessão fica em ApprovalQueue.
+    """
+
+    def __init__(self, df_final, key_column):
+        self.key_column = key_column
+        self.item_type = ITEM_TYPES[key_column]
+        if key_column == 'Nome_Produto2':
+            # Mesma regra da tela original: a sugestão da primeira linha de cada produto
+            rows = df_final.drop_duplicates('Nome_Produto2')
+            self.suggestion = dict(zip(rows['Nome_Produto2'], rows['Sugestao_Compra']))
+        else:
+            totals = df_final.groupby(key_column, sort=False, observed=True)['Sugestao_Compra'].sum()
+            rows = totals.reset_index()
+            self.suggestion = dict(zip(totals.index, totals.values))
+        self.keys = list(self.suggestion)
+        self.position = {key: i for i, key in enumerate(self.keys)}
+        self.total = float(df_final['Sugestao_Compra'].sum())
+        self.groups = {
+            column: {value: set(keys) for value, keys in rows.groupby(column, observed=True)[key_column]}
+            for column in FILTER_COLUMNS[key_column]
+        }
+
+    def select(self, filters):
+        """ Itens que atendem a todos os filtros {coluna: [valores]}, na ordem da fila """
+        selected = None
+        for column, values in filters.items():
+            if not values:
+                continue
+            groups = self.groups[column]
+            keys = set().union(*(groups.get(value, ()) for value in values))
+            selected = keys if selected is None else selected & keys
+        if selected is None:
+            return []
+        return sorted(selected, key=self.position.__getitem__)
+
+
+class ApprovalQueue:
+    """ Fila de aprovação de uma sessão: conjunto de revisados + cursor, O(1) por decisão.
+
+    `decisions` ({chave: (status, quantidade)}) retoma uma revisão gravada; `on_decision`
+    é chamado a cada nova decisão com (chave, status, quantidade).
+    """
+
+    def __init__(self, index, decisions=None, on_decision=None):
+        self.index = index
+        self.cursor = 0
+        self.reviewed = set()
+        self.approved = {}  # chave -> registro, na ordem de aprovação
+        self.last_decision = None
+        self._on_decision = on_decision
+        keys = {str(key): key for key in index.keys}
+        for stored_key, (status, quantity) in (decisions or {}).items():
+            key = keys.get(stored_key)
+            if key is None:
+                continue
+            self.reviewed.add(key)
+            if status == STATUS_APROVADO:
+                self.approved[key] = self._record(key, status, quantity)
+
+    def _record(self, key, status, quantity):
+        return {self.index.key_column: key, "Sugestao_Compra": quantity, "Status": status}
+
+    def current(self):
+        """ Próximo item ainda não revisado, ou None """
+        keys = self.index.keys
+        # Itens decididos em lote à frente do cursor são pulados; cada item é pulado uma única vez
+        while self.cursor < len(keys) and keys[self.cursor] in self.reviewed:
+            self.cursor += 1
+        return keys[self.cursor] if self.cursor < len(keys) else None
+
+    def decide(self, key, approved):
+        if key in self.reviewed:
+            return
+        self.reviewed.add(key)
+        status = STATUS_APROVADO if approved else STATUS_NAO_APROVADO
+        quantity = self.index.suggestion[key]
+        if approved:
+            self.approved[key] = self._record(key, status, quantity)
+        self.last_decision = (key, status)
+        if self._on_decision is not None:
+            self._on_decision(key, status, quantity)
+
+    def pending(self, filters):
+        """ Itens ainda não revisados que atendem aos filtros """
+        return [key for key in self.index.select(filters) if key not in self.reviewed]
+
+    def decide_many(self, keys, approved):
+        """ Aprova ou rejeita os itens em lote; retorna quantos foram decididos agora """
+        keys = [key for key in keys if key not in self.reviewed]
+        for key in keys:
+            self.decide(key, approved)
+        return len(keys)
+
+    def pending_count(self, filters=None):
+        if not filters or not any(filters.values()):
+            return len(self.index.keys) - len(self.reviewed)
+        return len(self.pending(filters))
+
+    @property
+    def total_approved(self):
+        return len(self.approved)
+
+    @property
+    def total_rejected(self):
+        return len(self.reviewed) - len(self.approved)
+
+    def records(self):
+        return list(self.approved.values())
+
+
+def get_approval_index(df_final, key_column):
+    """ Índice montado uma vez por versão dos dados e compartilhado entre as sessões """
+    return DATA_CACHE.get_or_load(('approval_index', key_column, data_version(df_final)),
+                                  lambda: ApprovalIndex(df_final, key_column), copy=False)
@@ -0,0 +1,52 @@
+""" Mede o ajuste dos modelos de previsão (SKUs/segundo), em série e no pool de processos, e o refit incremental.
+
+Uso: python benchmarks/bench_forecasting.py [n_skus] [dias]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forecast_models import fit_models, point_forecast, update_state  # noqa: E402
+from forecasting import FORECAST_WORKERS, fit_parallel  # noqa: E402
+
+
+def make_sales(n_skus, n_days, rng):
+    """ Metade dos SKUs com venda regular, metade intermitente """
+    taxa = rng.gamma(2.0, 3.0, n_skus)
+    vendas = rng.poisson(taxa, (n_days, n_skus)).astype(float)
+    intermitentes = rng.random(n_skus) < 0.5
+    vendas[:, intermitentes] *= rng.random((n_days, intermitentes.sum())) < 0.2
+    return vendas
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main(n_skus=20_000, n_days=365):
+    rng = np.random.default_rng(42)
+    vendas = make_sales(n_skus, n_days, rng)
+    print(f'{n_skus} SKUs x {n_days} dias')
+
+    serial, state = timed(lambda: fit_models(vendas))
+    print(f'{"ajuste em série":<32} {serial:7.2f} s  {n_skus / serial:10.0f} SKUs/s')
+
+    paralelo, state_pool = timed(lambda: fit_parallel(vendas, FORECAST_WORKERS))
+    print(f'{"ajuste no pool (" + str(FORECAST_WORKERS) + " processos)":<32} {paralelo:7.2f} s  '
+          f'{n_skus / paralelo:10.0f} SKUs/s')
+    assert np.allclose(point_forecast(state), point_forecast(state_pool))
+
+    # Refit incremental: um dia novo incorporado ao estado já ajustado
+    dia = make_sales(n_skus, 1, rng)[0]
+    incremental, _ = timed(lambda: update_state(state, dia))
+    print(f'{"novo dia (warm start)":<32} {incremental * 1000:7.2f} ms {n_skus / incremental:10.0f} SKUs/s')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,43 @@
+""" Compara a formatação brasileira por elemento (.apply) com a versão vetorizada.
+
+Uso: python benchmarks/bench_formatting.py [n_valores]
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from formatting import brazilian_format, brazilian_format_array, format_brazilian_array  # noqa: E402
+
+
+def brazilian_format_legacy(num):
+    # Implementação anterior, com três str.replace encadeados
+    return '{:,.0f}'.format(num).replace(",", "@").replace(".", ",").replace("@", ".")
+
+
+def main(n=100_000):
+    rng = np.random.default_rng(42)
+    # Quantidades de estoque/sugestão se repetem bastante entre SKUs
+    values = pd.Series(rng.integers(0, 5_000, size=n).astype(float))
+
+    legacy = values.apply(brazilian_format_legacy)
+    assert (legacy == brazilian_format_array(values)).all()
+
+    brazilian_format.cache_clear()
+    cases = {
+        'apply (legado)': lambda: values.apply(brazilian_format_legacy),
+        'brazilian_format_array': lambda: brazilian_format_array(values),
+        'format_brazilian_array': lambda: format_brazilian_array(values),
+    }
+    print(f'{n} valores')
+    for name, func in cases.items():
+        best = min(timeit.repeat(func, number=1, repeat=5))
+        print(f'{name:<25} {best * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,94 @@
+""" Mede o tempo de import (cold start) de cada módulo de entrada do app e compara com o orçamento.
+
+Cada módulo é importado em um processo novo com `python -X importtime`; o menor tempo entre as
+repetições é comparado com STARTUP_BUDGET_MS. Sai com código 1 se algum módulo estourar o orçamento.
+
+Uso: python benchmarks/bench_startup.py [repeticoes]
+"""
+import ast
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orçamento de import por módulo, em ms (tela de boas-vindas, menu e cada página)
+STARTUP_BUDGET_MS = {
+    'start_page': 1500,
+    'main': 2500,
+    'page_feedback': 2500,
+    'page_call_to_action': 3500,
+    'page_analytics_predict': 4000,
+}
+# Scripts do Streamlit: mede só os imports de nível de módulo
+SCRIPTS = {'start_page'}
+# Dependências mais pesadas listadas por módulo
+TOP_DEPENDENCIES = 8
+
+
+def script_imports(module):
+    """ Imports de nível de módulo de um script do Streamlit, que não pode ser importado fora do `streamlit run` """
+    with open(os.path.join(ROOT, f'{module}.py'), encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    nodes = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    names = {alias.name for node in nodes if isinstance(node, ast.Import) for alias in node.names}
+    names |= {node.module for node in nodes if isinstance(node, ast.ImportFrom)}
+    return '; '.join(ast.unparse(node) for node in nodes) or 'pass', names
+
+
+def import_times(module):
+    """ Importa `module` em um processo novo; retorna (tempo total, {import: tempo acumulado}) em ms """
+    if module in SCRIPTS:
+        code, names = script_imports(module)
+    else:
+        code, names = f'import {module}', None
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    total, deps, children = 0.0, {}, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Dois espaços por nível; os imports filhos aparecem antes do módulo que os importou
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name, ms = name.strip(), int(cumulative) / 1000
+        if depth == 1:
+            children[name] = ms
+        elif depth == 0:
+            if names is not None and name in names:
+                # Script: cada import de nível de módulo entra no total
+                total += ms
+                deps[name] = ms
+            elif name == module:
+                total, deps = ms, children
+            children = {}
+    return total, deps
+
+
+def measure(module, repeats):
+    # O menor tempo é o menos afetado por ruído do sistema
+    return min((import_times(module) for _ in range(repeats)), key=lambda run: run[0])
+
+
+def main(repeats=3):
+    failed = False
+    for module, budget in STARTUP_BUDGET_MS.items():
+        try:
+            total, times = measure(module, repeats)
+        except RuntimeError as e:
+            print(f'{module:<24} erro no import: {e}')
+            failed = True
+            continue
+        status = 'ok' if total <= budget else 'ACIMA DO ORÇAMENTO'
+        failed |= total > budget
+        print(f'{module:<24} {total:8.1f} ms  (orçamento {budget} ms)  {status}')
+        deps = sorted(((ms, name) for name, ms in times.items()), reverse=True)
+        for ms, name in deps[:TOP_DEPENDENCIES]:
+            print(f'    {name:<28} {ms:8.1f} ms')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:2])))
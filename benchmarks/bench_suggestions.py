@@ -0,0 +1,75 @@
+""" Mede o motor de sugestões de compra com SKUs sintéticos: cálculo completo e recálculo só dos alterados.
+
+Uso: python benchmarks/bench_suggestions.py [n_skus]
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forecast_store import ForecastStore, _frame_blocks, write_forecast_store  # noqa: E402
+from suggestion_engine import SuggestionEngine  # noqa: E402
+
+
+def make_data(n, rng):
+    ids = np.arange(1, n + 1)
+    venda_30d = rng.poisson(60, n).astype(float)
+    df_final = pd.DataFrame({
+        'Produto_ID': ids,
+        'Custo_Unitario': rng.uniform(5, 500, n).round(2),
+        'Quantidade_Estoque_Atual': rng.integers(0, 300, n).astype(float),
+        'Venda_ult_30d': venda_30d,
+        'Venda_ult_60': venda_30d * 2 + rng.poisson(5, n),
+        'Venda_ult_90d': venda_30d * 3 + rng.poisson(10, n),
+        'Lead_Time_Dias': rng.integers(3, 45, n).astype(float),
+        'Classificacao ABC': rng.choice(['A', 'B', 'C'], n, p=[0.2, 0.3, 0.5]),
+        'Criticidade': rng.choice(['Alta', 'Média', 'Baixa'], n),
+    })
+    datas = pd.date_range('2023-01-01', periods=30)
+    previsoes = pd.DataFrame(rng.poisson(2, (30, n)).astype(float), columns=[str(i) for i in ids])
+    previsoes.insert(0, 'Data', datas)
+    previsoes.insert(1, 'Historico_Projecao', 'Projecao')
+    # O motor lê a projeção do store longo de 'previsoes'
+    path = os.path.join(tempfile.mkdtemp(prefix='stockon-bench-'), 'previsoes')
+    write_forecast_store(_frame_blocks(previsoes), path)
+    return df_final, ForecastStore(path)
+
+
+def main(n=100_000):
+    rng = np.random.default_rng(42)
+    df_final, forecast_store = make_data(n, rng)
+
+    print(f'{n} SKUs')
+    best = min(timeit.repeat(lambda: SuggestionEngine(df_final, forecast_store), number=1, repeat=3))
+    print(f'{"construção + cálculo completo":<40} {best * 1000:8.1f} ms')
+
+    engine = SuggestionEngine(df_final, forecast_store)
+    best = min(timeit.repeat(lambda: engine._recompute(np.ones(n, dtype=bool)), number=1, repeat=5))
+    print(f'{"recálculo de todos os SKUs":<40} {best * 1000:8.1f} ms')
+
+    # Movimentação de estoque em 1% dos SKUs (um lote de saídas do dia)
+    afetados = rng.choice(df_final['Produto_ID'], n // 100, replace=False)
+    movimentos = pd.Series(-rng.integers(1, 5, len(afetados)), index=afetados)
+    best = min(timeit.repeat(lambda: engine.apply_movements(movimentos), number=1, repeat=5))
+    print(f'{"movimentação em 1% dos SKUs":<40} {best * 1000:8.1f} ms ({engine.recomputed} recalculados)')
+
+    # Novo lead time em 1% dos SKUs; os com valor igual não são recalculados
+    mudancas = pd.DataFrame({'Lead_Time_Dias': rng.integers(3, 45, len(afetados)).astype(float)}, index=afetados)
+    best = min(timeit.repeat(lambda: engine.update(mudancas), number=1, repeat=1))
+    print(f'{"atualização de entrada em 1% dos SKUs":<40} {best * 1000:8.1f} ms ({engine.recomputed} recalculados)')
+    best = min(timeit.repeat(lambda: engine.update(mudancas), number=1, repeat=5))
+    print(f'{"mesma atualização repetida":<40} {best * 1000:8.1f} ms ({engine.recomputed} recalculados)')
+
+    # Confere que o incremental bate com um cálculo completo do estado atual
+    incremental = engine.sugestao.copy()
+    engine._recompute(np.ones(n, dtype=bool))
+    assert np.array_equal(incremental, engine.sugestao)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
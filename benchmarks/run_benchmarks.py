@@ -0,0 +1,219 @@
+""" Roda os caminhos críticos do app sobre dados sintéticos, medindo tempo e pico de memória (tracemalloc).
+
+Cada execução é gravada em benchmarks/results.jsonl com a versão do código e a escala; o resultado é
+comparado com a execução anterior na mesma escala e o script sai com código 1 se algum caso piorou
+além da tolerância.
+
+Uso: python benchmarks/run_benchmarks.py [n_skus] [n_dias] [--repeat N] [--tolerance 0.2] [--only caso ...]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Snapshots e stores gravados pelos casos ficam fora da pasta do app
+os.environ.setdefault('STOCKON_SNAPSHOT_DIR', tempfile.mkdtemp(prefix='stockon-bench-'))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from approval_queue import ApprovalIndex, ApprovalQueue  # noqa: E402
+from dataset_schema import SCHEMAS, apply_schema  # noqa: E402
+from forecast_store import ForecastStore, _frame_blocks, open_forecast_store, write_forecast_store  # noqa: E402
+from forecasting import ForecastEngine  # noqa: E402
+from formatting import brazilian_format_array  # noqa: E402
+from intent_router import IntentRouter  # noqa: E402
+from prompt_builder import build_prompt  # noqa: E402
+from ruptura_metrics import RupturaMetricsEngine  # noqa: E402
+from snapshot_store import SNAPSHOT_DIR  # noqa: E402
+from suggestion_engine import SuggestionEngine  # noqa: E402
+from synthetic_data import generate  # noqa: E402
+
+RESULTS_PATH = os.path.join(ROOT, 'benchmarks', 'results.jsonl')
+# Diferenças abaixo disso são ruído, mesmo que passem da tolerância
+MIN_DELTA_SECONDS = 0.005
+MIN_DELTA_MB = 1.0
+
+QUESTIONS = ['Quais produtos estão abaixo do estoque mínimo?', 'produtos de alta criticidade do setor Informática',
+             'Qual a sugestão de compra total?', 'histórico de vendas dos últimos 30 dias',
+             'Por que a ruptura aumentou?']
+
+
+def load_typed(n_skus, n_days):
+    """ Datasets sintéticos com os tipos do schema, como o app os lê dos snapshots """
+    raw = generate(n_skus, n_days)
+    data = {name: apply_schema(df, SCHEMAS.get(name, {})) for name, df in raw.items()}
+    data['df_final']['Valor_Total_Compra'] = data['df_final']['Custo_Unitario'] * data['df_final']['Sugestao_Compra']
+    for name, df in data.items():
+        df.attrs['versao'] = f'bench-{name}-{n_skus}-{n_days}'
+    return raw, data
+
+
+def approval_flow(df_final):
+    """ Revisão produto a produto até o fim da fila e aprovação em lote por Setor """
+    queue = ApprovalQueue(ApprovalIndex(df_final, 'Nome_Produto2'))
+    for setor in df_final['Setor'].cat.categories[:2]:
+        queue.decide_many(queue.pending({'Setor': [setor]}), True)
+    while queue.current() is not None:
+        queue.decide(queue.current(), True)
+    return queue.records()
+
+
+def graficos(df_final, store):
+    """ Preparo dos dados dos gráficos do dashboard: rótulos, agregação por produto e séries de previsão """
+    brazilian_format_array(df_final['Sugestao_Compra'])
+    df_grouped = df_final.groupby('Nome_Produto2', observed=True).agg(
+        {'Quantidade_Estoque_Atual': 'sum', 'Estoque_Minimo': 'mean'}).reset_index()
+    brazilian_format_array(df_grouped['Quantidade_Estoque_Atual'])
+    for product in store.products[:100]:
+        store.series(product)
+
+
+def intent_routing(df_final, df_vendas_estoque):
+    router = IntentRouter(df_final)
+    for question in QUESTIONS:
+        match = router.route(question)
+        if match is not None:
+            router.answer(match, df_final, df_vendas_estoque)
+
+
+def forecast_store(previsoes, path):
+    """ Grava o store longo do zero e lê a projeção por produto """
+    shutil.rmtree(path, ignore_errors=True)
+    write_forecast_store(_frame_blocks(previsoes), path)
+    return ForecastStore(path).projection_by_product()
+
+
+def build_cases(raw, data):
+    """ {nome: função sem argumentos}; cada chamada monta os objetos do zero, sem os caches do app """
+    df_final, previsoes, vendas = data['df_final'], data['previsoes'], data['df_vendas_estoque']
+    store = open_forecast_store('bench', lambda: _frame_blocks(previsoes))
+    ruptura = RupturaMetricsEngine(df_final, store).result()
+    # Recebimento de um item: só o produto, o Setor e a classe ABC dele são recalculados
+    ruptura_engine = RupturaMetricsEngine(df_final, store)
+    ruptura_engine.result()
+    recebimento = pd.Series([10.0], index=df_final['Produto_ID'].iloc[:1])
+    return {
+        'schema': lambda: apply_schema(raw['df_vendas_estoque'], SCHEMAS['df_vendas_estoque']),
+        'forecast_fit': lambda: ForecastEngine(vendas, workers=1),
+        'forecast_store': lambda: forecast_store(previsoes, os.path.join(SNAPSHOT_DIR, 'bench-store')),
+        'ruptura_metrics': lambda: RupturaMetricsEngine(df_final, store).result(),
+        'ruptura_receipt': lambda: ruptura_engine.apply_movements(recebimento),
+        'suggestions': lambda: SuggestionEngine(df_final, store).result(),
+        'graficos': lambda: graficos(df_final, store),
+        'intent_router': lambda: intent_routing(df_final, vendas),
+        'prompt': lambda: build_prompt(df_final, ruptura, store, QUESTIONS[0]),
+        'approval_flow': lambda: approval_flow(df_final),
+    }
+
+
+def measure(func, repeat):
+    """ Melhor tempo entre as repetições e pico de memória alocada (MB) em uma execução à parte """
+    best = min(_timed(func) for _ in range(repeat))
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': best, 'peak_mb': peak / 2 ** 20}
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def code_version():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecida'
+
+
+def previous_run(path, n_skus, n_days):
+    """ Última execução gravada na mesma escala, ou None """
+    if not os.path.exists(path):
+        return None
+    previous = None
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            run = json.loads(line)
+            if run['n_skus'] == n_skus and run['n_days'] == n_days:
+                previous = run
+    return previous
+
+
+def regressions(results, previous, tolerance):
+    """ Casos mais lentos ou com mais memória que a execução anterior, além da tolerância """
+    found = []
+    for name, current in results.items():
+        before = (previous or {}).get('results', {}).get(name)
+        if before is None:
+            continue
+        slower = (current['seconds'] > before['seconds'] * (1 + tolerance)
+                  and current['seconds'] - before['seconds'] > MIN_DELTA_SECONDS)
+        bigger = (current['peak_mb'] > before['peak_mb'] * (1 + tolerance)
+                  and current['peak_mb'] - before['peak_mb'] > MIN_DELTA_MB)
+        if slower or bigger:
+            found.append(name)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('n_skus', type=int, nargs='?', default=1000)
+    parser.add_argument('n_days', type=int, nargs='?', default=365)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--only', nargs='*', help='casos a rodar (padrão: todos)')
+    parser.add_argument('--results', default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    raw, data = load_typed(args.n_skus, args.n_days)
+    print(f'{args.n_skus} SKUs x {args.n_days} dias: dados gerados em {time.perf_counter() - start:.1f} s')
+    cases = build_cases(raw, data)
+    previous = previous_run(args.results, args.n_skus, args.n_days)
+
+    results = {}
+    for name, func in cases.items():
+        if args.only and name not in args.only:
+            continue
+        results[name] = measure(func, args.repeat)
+        before = (previous or {}).get('results', {}).get(name)
+        delta = f"{results[name]['seconds'] / before['seconds'] - 1:+7.1%}" if before else ''
+        print(f"{name:<18} {results[name]['seconds'] * 1000:10.1f} ms  {results[name]['peak_mb']:9.1f} MB  {delta}")
+
+    run = {
+        'version': code_version(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'n_skus': args.n_skus,
+        'n_days': args.n_days,
+        'results': results,
+    }
+    with open(args.results, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(run) + '\n')
+
+    found = regressions(results, previous, args.tolerance)
+    if found:
+        print(f"Regressões em relação a {previous['version']}: {', '.join(found)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+""" Gera os seis datasets do app com dados sintéticos, nas colunas e tipos dos CSVs de origem, em qualquer escala.
+
+Uso: python benchmarks/synthetic_data.py [n_skus] [n_dias] [pasta]
+Para rodar o app sobre os dados gerados: STOCKON_DATA_SOURCE=<pasta> streamlit run start_page.py
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from suggestion_engine import DIAS_SEGURANCA_ABC, FATOR_CRITICIDADE, compute_suggestions  # noqa: E402
+
+SETORES = ['Eletrônicos', 'Esporte e lazer', 'Saúde e bem-estar', 'Casa e decoração', 'Brinquedos',
+           'Informática', 'Papelaria', 'Automotivo']
+CRITICIDADE = {3: 'Alta', 2: 'Média', 1: 'Baixa'}
+# Fatia acumulada da receita que fecha as curvas A e B
+CURVA_ABC = (0.8, 0.95)
+# Dias de histórico repetidos na tabela 'previsoes' e horizonte da projeção
+HISTORICO_PREVISOES = 60
+HORIZONTE = 30
+# Intervalo médio entre compras de um SKU, em dias
+INTERVALO_COMPRAS = 30
+FIM = pd.Timestamp('2023-12-31')
+
+
+def _classificacao_abc(receita):
+    ordem = np.argsort(-receita)
+    acumulado = np.empty_like(receita)
+    acumulado[ordem] = np.cumsum(receita[ordem]) / receita.sum()
+    return np.where(acumulado <= CURVA_ABC[0], 'A', np.where(acumulado <= CURVA_ABC[1], 'B', 'C'))
+
+
+def generate(n_skus=1000, n_days=365, seed=42):
+    """ Retorna {nome do dataset: DataFrame}, coerentes entre si (mesmos produtos, vendas e sugestões) """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, n_skus + 1)
+    nomes = np.array([f'Produto {i}' for i in ids], dtype=object)
+    skus = np.array([f'SKU{i:07d}' for i in ids], dtype=object)
+    setor = rng.choice(SETORES, n_skus)
+    custo = rng.uniform(5, 500, n_skus).round(2)
+    lead_time = rng.integers(3, 45, n_skus)
+    fornecedores = rng.integers(1, 5, n_skus)
+    datas = pd.date_range(end=FIM, periods=n_days, freq='D')
+
+    # Vendas diárias (dias x SKUs): metade com venda regular, metade intermitente
+    taxa = rng.gamma(2.0, 1.5, n_skus)
+    vendas = rng.poisson(taxa, (n_days, n_skus)).astype(np.int32)
+    intermitentes = rng.random(n_skus) < 0.5
+    vendas[:, intermitentes] *= (rng.random((n_days, intermitentes.sum())) < 0.2).astype(np.int32)
+    estoque = rng.poisson(taxa * 20, (n_days, n_skus)).astype(np.int32)
+    ruptura = np.maximum(vendas - estoque, 0)
+
+    abc = _classificacao_abc(taxa * custo)
+    # Curva A e poucos fornecedores aumentam a criticidade
+    criticidade_num = np.clip((abc == 'A') + (abc != 'C') + (fornecedores == 1), 1, 3)
+    criticidade = np.array([CRITICIDADE[c] for c in criticidade_num], dtype=object)
+
+    # Histórico diário no formato longo do CSV: os dias de cada produto em sequência
+    df_vendas_estoque = pd.DataFrame({
+        'Produto_ID': np.repeat(ids, n_days),
+        'Data': np.tile(datas.to_numpy(), n_skus),
+        'Nome_Produto2': np.repeat(nomes, n_days),
+        'SKU': np.repeat(skus, n_days),
+        'Setor': np.repeat(setor, n_days),
+        'Classificação ABC': np.repeat(abc, n_days),
+        'Quantidade Vendida': vendas.T.ravel(),
+        'Quantidade_Estoque': estoque.T.ravel(),
+        'Ruptura_Historica': ruptura.T.ravel(),
+        '% Ruptura': (ruptura / np.maximum(vendas, 1)).T.ravel().round(4),
+    })
+
+    projecao = np.maximum(taxa * rng.normal(1, 0.1, (HORIZONTE, n_skus)), 0).round(2)
+    historico = vendas[-HISTORICO_PREVISOES:]
+    previsoes = pd.DataFrame(np.vstack([historico, projecao]), columns=[str(i) for i in ids])
+    previsoes.insert(0, 'Data', datas[-len(historico):].append(
+        pd.date_range(FIM + pd.Timedelta(days=1), periods=HORIZONTE, freq='D')))
+    previsoes.insert(1, 'Historico_Projecao', ['Historico'] * len(historico) + ['Projecao'] * HORIZONTE)
+
+    venda_30d, venda_60d, venda_90d = (vendas[-dias:].sum(axis=0).astype(float) for dias in (30, 60, 90))
+    fator = np.array([FATOR_CRITICIDADE[c] for c in ('baixa', 'media', 'alta')])[criticidade_num - 1]
+    dias_seguranca = np.array([DIAS_SEGURANCA_ABC[c] for c in abc], dtype=float)
+    _, estoque_minimo, sugestao = compute_suggestions(
+        estoque[-1].astype(float), venda_30d, venda_60d, venda_90d, lead_time.astype(float), dias_seguranca, fator,
+        projecao.sum(axis=0))
+
+    df_final = pd.DataFrame({
+        'Produto_ID': ids,
+        'SKU': skus,
+        'Nome_Produto2': nomes,
+        'Setor': setor,
+        'Custo_Unitario': custo,
+        'Classificacao ABC': abc,
+        'Quantidade_Estoque_Atual': estoque[-1],
+        'Estoque_Minimo': estoque_minimo.astype(int),
+        'Criticidade_Num': criticidade_num,
+        'Criticidade': criticidade,
+        'Venda_ult_30d': venda_30d.astype(int),
+        'Venda_ult_60': venda_60d.astype(int),
+        'Venda_ult_90d': venda_90d.astype(int),
+        'Lead_Time_Dias': lead_time,
+        'Sugestao_Compra': sugestao.astype(int),
+    })
+
+    # Uma compra a cada ~INTERVALO_COMPRAS dias por SKU
+    n_compras = max(n_days // INTERVALO_COMPRAS, 1)
+    produto = np.repeat(np.arange(n_skus), n_compras)
+    quantidade = np.maximum(rng.poisson(np.repeat(taxa, n_compras) * INTERVALO_COMPRAS), 1)
+    df_compras = pd.DataFrame({
+        'Produto_ID': ids[produto],
+        'Data': datas[rng.integers(0, n_days, len(produto))],
+        'Nome_Produto2': nomes[produto],
+        'SKU': skus[produto],
+        'Setor': setor[produto],
+        'Quantidade_Comprada': quantidade,
+        'Custo_Unitario': custo[produto],
+        'Valor_Compra': (quantidade * custo[produto]).round(2),
+    }).sort_values(['Data', 'Produto_ID'], ignore_index=True)
+
+    df_produtos = pd.DataFrame({
+        'Produto_ID': ids,
+        'SKU': skus,
+        'Nome_Produto2': nomes,
+        'Setor': setor,
+        'Custo_Unitario': custo,
+        'Qtd_Fornecedores': fornecedores,
+        'Lead_Time_Dias': lead_time,
+    })
+
+    sugestoes = df_final[['Produto_ID', 'SKU', 'Nome_Produto2', 'Setor', 'Classificacao ABC', 'Criticidade',
+                          'Sugestao_Compra', 'Custo_Unitario']].copy()
+    sugestoes['Valor_Total_Compra'] = (sugestoes['Sugestao_Compra'] * sugestoes['Custo_Unitario']).round(2)
+
+    return {
+        'df_compras': df_compras,
+        'df_final': df_final,
+        'df_produtos': df_produtos,
+        'df_vendas_estoque': df_vendas_estoque,
+        'previsoes': previsoes,
+        'sugestoes': sugestoes,
+    }
+
+
+def write_csvs(datasets, directory):
+    """ Grava um CSV por dataset, com os nomes esperados por STOCKON_DATA_SOURCE """
+    os.makedirs(directory, exist_ok=True)
+    for name, df in datasets.items():
+        df.to_csv(os.path.join(directory, f'{name}.csv'), index=False)
+
+
+def main(n_skus=1000, n_days=365, directory='dados_sinteticos'):
+    datasets = generate(n_skus, n_days)
+    write_csvs(datasets, directory)
+    for name, df in datasets.items():
+        print(f'{name:<20} {len(df):>12,} linhas  {df.memory_usage(deep=True).sum() / 2 ** 20:10.1f} MB')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]), *sys.argv[3:4])
@@ -1,92 +1,134 @@
-import openai
-import ast
-from decouple import config
-import streamlit as st
-from user_context import user_context
-
-# Importando as funções para carregar os dataframes
-from dataframe import load_df_compras, load_df_final, load_df_vendas_estoque, load_previsoes
-
-MAX_TRIES = 3
-
-def reformulate_question(original_question):
-    reformulations = {
-        "Quais são os produtos de alta criticidade?": 
-        "Mostre-me o código para obter os produtos de alta criticidade.",
-        "Quero ver o histórico de vendas.": 
-        "Mostre-me o código para visualizar o histórico de vendas.",
-    }
-    return reformulations.get(original_question, original_question)
-
-def contains_code_keywords(response_content):
-    code_keywords = [
-        "df", "groupby", "dataframe", ".loc", ".iloc", 
-        "plot", "filter", "merge", "join", "set_index", 
-        "reset_index", "pivot_table", "concat", "read_csv", 
-        "fillna", "dropna", "sort_values", "apply", "lambda", 
-        "map", "unique", "nunique", "value_counts", "astype", 
-        "to_datetime", "cut", "qcut", "rolling", "shift", 
-        "head", "tail", "mean", "sum", "median", "min", "max", 
-        "std", "var", "corr", "describe", "python", "dataframe", "print",
-        "df_final", "df_vendas_estoque", "df_compras", "previsoes"
-    ]
-    
-    general_python_keywords = [
-        "for ", "while ", "if ", "elif ", "else:", "def ", "return", 
-        "import ", "from ", "with ", "as ", "print(", "class ", 
-        "try:", "except:", "raise", "assert ", "break", "continue", 
-        "global ", "pass", "yield", "list(", "dict(", "set(", "tuple("
-    ]
-    
-    combined_keywords = code_keywords + general_python_keywords
-    return any(keyword in response_content for keyword in combined_keywords)
-
-def validate_code(code):
-    try:
-        tree = ast.parse(code)
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Name) and node.id not in code:
-                return False, f"Variável '{node.id}' não definida"
-        return True, None
-    except Exception as e:
-        return False, str(e)
-
-def get_chatgpt_response(user_input, user_context):
-    openai_api_key = config('OPENAI_API_KEY')
-    if not openai_api_key:
-        st.error("Chave API da OpenAI não configurada.")
-        raise ValueError("Chave API da OpenAI não encontrada!")
-    openai.api_key = openai_api_key
-    
-    with st.spinner('Aguarde enquanto a análise é realizada...'):
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": user_context},
-                {"role": "user", "content": f'Os dataframes a seguir correspondem à métricas de gestão de estoque, ruptura, venda e previsão de demanda. Com base nesses dataframes df_final, previsoes, df_vendas_estoque, forneça uma resposta para {user_input}. Se a resposta envolver uma análise de dados, forneça um código Python adequado para executar no dataframe correspondente.'},
-            ]
-        )
-        return response['choices'][0]['message']['content']
-
-def main():
-    df_compras = load_df_compras()
-    df_final = load_df_final()
-    df_vendas_estoque = load_df_vendas_estoque()
-    previsoes = load_previsoes()
-
-    for _ in range(MAX_TRIES):
-        response_content = get_chatgpt_response(complete_question, user_context)
-        if contains_code_keywords(response_content):
-            code_blocks = response_content.split("```python")
-            python_code = code_blocks[-1].split("```")[0].strip()
-            is_valid, error_msg = validate_code(python_code)
-            if is_valid:
-                st.code(python_code)
-                break
-            else:
-                st.error(f"Erro encontrado no código: {error_msg}")
-                complete_question += " Por favor, corrija e tente novamente."
-        else:
-            st.write(response_content)
-    else:
-        st.write("Não foi possível obter uma resposta adequada. Por favor, reformule sua pergunta ou tente mais tarde.")
\ No newline at end of file
+import ast
+from decouple import config
+import streamlit as st
+from user_context import user_context
+from llm_cache import chat_completion, discard_answer
+from llm_stream import StreamingAnswer, render_stream
+
+from code_executor import SandboxError, validate_generated_code, run_generated_code, render_result
+from plan_cache import get_plan_cache, normalize_intent
+
+MAX_TRIES = 3
+CHATGPT_MODEL = "gpt-4"
+
+REFORMULATIONS = {
+    "Quais são os produtos de alta criticidade?": 
+    "Mostre-me o código para obter os produtos de alta criticidade.",
+    "Quero ver o histórico de vendas.": 
+    "Mostre-me o código para visualizar o histórico de vendas.",
+}
+# Busca pela intenção: variações de escrita da mesma pergunta também são reformuladas
+REFORMULATIONS_BY_INTENT = {normalize_intent(question): text for question, text in REFORMULATIONS.items()}
+
+def reformulate_question(original_question):
+    return REFORMULATIONS_BY_INTENT.get(normalize_intent(original_question), original_question)
+
+def run_cached_plan(user_question):
+    """ Executa o código já validado para a mesma intenção, sem consultar o modelo """
+    plans = get_plan_cache()
+    python_code = plans.get(user_question)
+    if python_code is None:
+        return False
+    try:
+        result, output = run_generated_code(python_code)
+    except SandboxError:
+        # O plano não funciona mais com os dados atuais: volta a perguntar ao modelo
+        plans.discard(user_question)
+        return False
+    st.code(python_code)
+    if output:
+        st.text(output)
+    render_result(result)
+    return True
+
+def contains_code_keywords(response_content):
+    code_keywords = [
+        "df", "groupby", "dataframe", ".loc", ".iloc", 
+        "plot", "filter", "merge", "join", "set_index", 
+        "reset_index", "pivot_table", "concat", "read_csv", 
+        "fillna", "dropna", "sort_values", "apply", "lambda", 
+        "map", "unique", "nunique", "value_counts", "astype", 
+        "to_datetime", "cut", "qcut", "rolling", "shift", 
+        "head", "tail", "mean", "sum", "median", "min", "max", 
+        "std", "var", "corr", "describe", "python", "dataframe", "print",
+        "df_final", "df_vendas_estoque", "df_compras", "previsoes"
+    ]
+    
+    general_python_keywords = [
+        "for ", "while ", "if ", "elif ", "else:", "def ", "return", 
+        "import ", "from ", "with ", "as ", "print(", "class ", 
+        "try:", "except:", "raise", "assert ", "break", "continue", 
+        "global ", "pass", "yield", "list(", "dict(", "set(", "tuple("
+    ]
+    
+    combined_keywords = code_keywords + general_python_keywords
+    return any(keyword in response_content for keyword in combined_keywords)
+
+def validate_code(code):
+    try:
+        tree = ast.parse(code)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and node.id not in code:
+                return False, f"Variável '{node.id}' não definida"
+        return True, None
+    except Exception as e:
+        return False, str(e)
+
+def get_chatgpt_response(user_input, user_context, placeholder=None):
+    """ Consulta o modelo; com `placeholder`, a resposta é exibida token a token enquanto chega """
+    openai_api_key = config('OPENAI_API_KEY')
+    if not openai_api_key:
+        st.error("Chave API da OpenAI não configurada.")
+        raise ValueError("Chave API da OpenAI não encontrada!")
+    
+    messages = [
+        {"role": "system", "content": user_context},
+        {"role": "user", "content": f'Os dataframes a seguir correspondem à métricas de gestão de estoque, ruptura, venda e previsão de demanda. Com base nesses dataframes df_final, previsoes, df_vendas_estoque, forneça uma resposta para {user_input}. Se a resposta envolver uma análise de dados, forneça um código Python adequado para executar no dataframe correspondente.'},
+    ]
+
+    if placeholder is not None:
+        # A chamada roda no pool de threads; o script só consome os tokens
+        return render_stream(StreamingAnswer(CHATGPT_MODEL, messages, question=user_input, context=user_context),
+                             placeholder, prefix='')
+
+    with st.spinner('Aguarde enquanto a análise é realizada...'):
+        # Perguntas repetidas sobre o mesmo contexto saem do cache, sem nova chamada à API
+        return chat_completion(CHATGPT_MODEL, messages, question=user_input, context=user_context)
+
+def main(user_question):
+    # O código gerado roda no sandbox, que já tem os dataframes carregados em processos próprios
+    if run_cached_plan(user_question):
+        return
+    complete_question = reformulate_question(user_question)
+
+    for round_trips in range(1, MAX_TRIES + 1):
+        response_content = get_chatgpt_response(complete_question, user_context)
+        if contains_code_keywords(response_content):
+            code_blocks = response_content.split("```python")
+            python_code = code_blocks[-1].split("```")[0].strip()
+            is_valid, error_msg = validate_code(python_code)
+            if is_valid:
+                is_valid, error_msg = validate_generated_code(python_code)
+            if is_valid:
+                st.code(python_code)
+                try:
+                    result, output = run_generated_code(python_code)
+                except SandboxError as e:
+                    st.error(f"Erro ao executar o código: {e}")
+                    # A resposta com erro não fica no cache: a mesma pergunta volta a ser feita ao modelo
+                    discard_answer(CHATGPT_MODEL, complete_question, user_context)
+                    complete_question += " Por favor, corrija e tente novamente."
+                    continue
+                if output:
+                    st.text(output)
+                render_result(result)
+                get_plan_cache().put(user_question, python_code, round_trips)
+                break
+            else:
+                st.error(f"Erro encontrado no código: {error_msg}")
+                discard_answer(CHATGPT_MODEL, complete_question, user_context)
+                complete_question += " Por favor, corrija e tente novamente."
+        else:
+            st.write(response_content)
+    else:
+        st.write("Não foi possível obter uma resposta adequada. Por favor, reformule sua pergunta ou tente mais tarde.")
@@ -0,0 +1,341 @@
+import ast
+import multiprocessing
+import queue
+import threading
+
+import pandas as pd
+import streamlit as st
+from decouple import config
+
+from sandbox_worker import ALLOWED_MODULES, worker_main
+from snapshot_store import snapshot_version
+
+SANDBOX_WORKERS = config('STOCKON_SANDBOX_WORKERS', default=2, cast=int)
+SANDBOX_TIMEOUT = config('STOCKON_SANDBOX_TIMEOUT', default=20, cast=float)
+SANDBOX_CPU_SECONDS = config('STOCKON_SANDBOX_CPU_SECONDS', default=15, cast=int)
+SANDBOX_MEMORY_MB = config('STOCKON_SANDBOX_MEMORY_MB', default=1024, cast=int)
+
+SANDBOX_DATASETS = ('df_compras', 'df_final', 'df_produtos', 'df_vendas_estoque', 'previsoes', 'sugestoes')
+
+# Nós permitidos no código gerado: expressões, atribuições, controle de fluxo simples e funções locais
+ALLOWED_NODES = (
+    ast.Module, ast.Expr, ast.Expression, ast.Assign, ast.AugAssign, ast.AnnAssign,
+    ast.Name, ast.Load, ast.Store, ast.Del, ast.Constant, ast.Attribute, ast.Subscript, ast.Slice,
+    ast.Call, ast.keyword, ast.Starred, ast.List, ast.Tuple, ast.Dict, ast.Set,
+    ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp, ast.JoinedStr, ast.FormattedValue,
+    ast.ListComp, ast.DictComp, ast.SetComp, ast.GeneratorExp, ast.comprehension,
+    ast.If, ast.For, ast.Break, ast.Continue, ast.Pass,
+    ast.FunctionDef, ast.Lambda, ast.arguments, ast.arg, ast.Return,
+    ast.Import, ast.ImportFrom, ast.alias,
+    ast.operator, ast.unaryop, ast.boolop, ast.cmpop, ast.expr_context,
+)
+
+BLOCKED_NAMES = {
+    'eval', 'exec', 'compile', 'open', '__import__', 'globals', 'locals', 'vars', 'getattr', 'setattr',
+    'delattr', 'input', 'breakpoint', 'exit', 'quit', 'help', 'memoryview', 'type', 'object',
+}
+
+# Atributos e métodos que o código gerado pode usar. É uma lista de permissões: o que não está aqui é
+# recusado, o que deixa de fora a entrada/saída de arquivos (read_*, to_csv, np.load, plt.imsave...),
+# eval/query, que avaliam texto, e os módulos internos (pd.io, plotly.offline, np.lib...)
+PANDAS_ATTRIBUTES = set("""
+    DataFrame Series Index MultiIndex DatetimeIndex Timestamp Timedelta Categorical CategoricalDtype Grouper
+    NamedAgg IndexSlice NA NaT DateOffset Period offsets Day Week MonthBegin MonthEnd QuarterEnd YearBegin
+    YearEnd BDay Hour Minute concat merge merge_asof pivot pivot_table crosstab cut qcut melt get_dummies
+    factorize date_range period_range timedelta_range to_datetime to_numeric to_timedelta isna isnull notna
+    notnull unique
+    T abs add add_prefix add_suffix agg aggregate align all any append apply applymap argmax argmin argsort
+    array asfreq asof assign astype at at_time between between_time bfill boxplot clip columns combine_first
+    convert_dtypes copy corr corrwith count cov cummax cummin cumprod cumsum describe diff div divide dot
+    drop drop_duplicates droplevel dropna dtype dtypes duplicated empty eq equals ewm expanding explode ffill
+    fillna filter first first_valid_index floordiv ge get groupby gt head hist iat idxmax idxmin iloc index
+    infer_objects insert interpolate isin items iterrows itertuples join keys kurt last last_valid_index le
+    loc lt map mask max mean median memory_usage min mod mode mul multiply name names ndim ne nlargest
+    nsmallest nunique pct_change plot pop pow prod product quantile rank reindex rename rename_axis
+    reorder_levels replace resample reset_index rolling round sample select_dtypes sem set_axis set_index
+    shape shift size skew sort_index sort_values squeeze stack std sub subtract sum swaplevel tail transform
+    transpose truediv truncate tz_convert tz_localize unstack update value_counts values var where xs
+    to_dict to_frame to_list to_numpy to_period to_pydatetime to_records to_series to_timestamp
+    to_flat_index tolist is_unique is_monotonic_increasing is_monotonic_decreasing hasnans
+    get_level_values levels nlevels intersection union difference
+    cumcount get_group groups ngroup ngroups nth ohlc
+    dt str cat year month day hour minute second weekday dayofweek day_of_week dayofyear day_of_year
+    quarter week isocalendar date time normalize strftime floor ceil days total_seconds month_name
+    day_name is_month_start is_month_end days_in_month tz now today
+    contains startswith endswith lower upper title capitalize strip lstrip rstrip split rsplit len slice
+    extract findall match fullmatch pad zfill find isdigit isnumeric isalpha
+    categories codes ordered add_categories remove_categories rename_categories set_categories
+    remove_unused_categories as_ordered
+    bar barh line pie scatter area box kde density
+""".split())
+NUMPY_ATTRIBUTES = set("""
+    array asarray arange linspace zeros ones full zeros_like ones_like full_like eye identity concatenate
+    vstack hstack column_stack reshape ravel flatten select absolute sqrt exp log log10 log2 log1p
+    expm1 power square sin cos tan around rint trunc sign maximum minimum fmax fmin nansum nanprod nanmean
+    nanmedian nanstd nanvar nanmin nanmax amin amax nanargmin nanargmax sort cumsum percentile nanpercentile
+    nanquantile average histogram bincount digitize corrcoef polyfit polyval isnan isinf isfinite nan inf pi
+    e newaxis int64 int32 float64 float32 bool_ datetime64 timedelta64 in1d intersect1d union1d setdiff1d
+    count_nonzero nonzero flatnonzero repeat tile roll interp divide outer matmul allclose isclose
+    array_equal vectorize apply_along_axis meshgrid logical_and logical_or logical_not item
+    random linalg seed rand randn randint normal uniform choice default_rng integers permutation poisson
+    norm inv solve lstsq det
+""".split())
+PLOT_ATTRIBUTES = set("""
+    express graph_objects pyplot colors qualitative sequential Plotly D3 G10 T10 Set1 Set2 Set3 Pastel
+    Dark24 Light24 Blues Reds Greens Viridis RdBu
+    histogram violin funnel treemap sunburst density_heatmap timeline strip
+    Figure Bar Scatter Pie Histogram Box Heatmap Table Indicator Waterfall Layout add_trace add_traces
+    update_layout update_traces update_xaxes update_yaxes add_hline add_vline add_annotation add_shape
+    add_bar add_scatter for_each_trace data layout
+    figure subplots subplot gcf gca title xlabel ylabel legend grid xticks yticks xlim ylim tight_layout
+    axhline axvline fill_between annotate text suptitle close twinx stackplot step errorbar colorbar
+    set_title set_xlabel set_ylabel set_xticks set_xticklabels set_yticks set_yticklabels set_xlim set_ylim
+    tick_params bar_label invert_yaxis axis spines set_visible set_size_inches autofmt_xdate set_facecolor
+    get_legend_handles_labels set_aspect margins xaxis yaxis
+""".split())
+# Biblioteca padrão (math, statistics, datetime, calendar) e métodos de str/list/dict
+STDLIB_ATTRIBUTES = set("""
+    fabs fsum isqrt comb factorial gcd stdev variance pstdev pvariance quantiles datetime timedelta
+    strptime fromisoformat isoformat isoweekday timestamp month_abbr day_abbr monthrange monthcalendar
+    isleap format ljust rjust center extend sort index
+""".split())
+ALLOWED_ATTRIBUTES = PANDAS_ATTRIBUTES | NUMPY_ATTRIBUTES | PLOT_ATTRIBUTES | STDLIB_ATTRIBUTES
+
+# Argumentos que levam a arquivos ou carregam módulos pelo nome (df.plot(backend=...))
+BLOCKED_KEYWORDS = {'backend', 'engine', 'buf', 'path_or_buf', 'filename', 'fname', 'file'}
+# Chamadas que aceitam o nome de outro método em texto (df.agg('sum'), aggfunc='sum') e o chamam
+STRING_DISPATCH = {'agg', 'aggregate', 'apply', 'applymap', 'map', 'transform', 'pivot_table', 'crosstab', 'NamedAgg'}
+# Textos com nomes de métodos de arquivo ou de avaliação, recusados em qualquer ponto do código
+BLOCKED_STRING_PREFIXES = ('_', 'read_', 'to_', 'write', 'save', 'load', 'eval', 'query')
+
+
+def blocked_string(value):
+    """ Indica se o texto pode chamar um método proibido por nome (df.agg('to_csv')) ou alcançar internos """
+    if '__' in value:
+        return True
+    return value.isidentifier() and value.startswith(BLOCKED_STRING_PREFIXES) and value not in ALLOWED_ATTRIBUTES
+
+
+def _static(node, dynamic):
+    """ Valor que não é montado em tempo de execução: literal, lambda, atributo ou nome não calculado """
+    if isinstance(node, (ast.Constant, ast.Lambda, ast.Attribute)):
+        return True
+    if isinstance(node, ast.Name):
+        return node.id not in dynamic
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return all(_static(elt, dynamic) for elt in node.elts)
+    if isinstance(node, ast.Dict):
+        return all(_static(item, dynamic) for item in node.keys + node.values if item is not None)
+    return False
+
+
+def _literal(node):
+    """ Valor escrito por inteiro no código: texto, número, lambda ou coleção deles """
+    if isinstance(node, (ast.Constant, ast.Lambda)):
+        return True
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return all(_literal(elt) for elt in node.elts)
+    if isinstance(node, ast.Dict):
+        return all(_literal(item) for item in node.keys + node.values if item is not None)
+    return False
+
+
+def _dynamic_names(tree):
+    """ Nomes que recebem valores calculados (parâmetros, resultados de expressões) em algum ponto """
+    dynamic = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign):
+            targets, value = node.targets, node.value
+        elif isinstance(node, (ast.AugAssign, ast.AnnAssign)):
+            targets, value = [node.target], None if isinstance(node, ast.AugAssign) else node.value
+        elif isinstance(node, (ast.For, ast.comprehension)):
+            targets, value = [node.target], node.iter
+        elif isinstance(node, ast.arg):
+            dynamic.add(node.arg)
+            continue
+        else:
+            continue
+        if value is None or not _literal(value):
+            dynamic.update(name.id for target in targets for name in ast.walk(target) if isinstance(name, ast.Name))
+    return dynamic
+
+
+class SandboxError(Exception):
+    pass
+
+
+class _PoolClosed(Exception):
+    """ O pool foi substituído por outro com dados mais novos enquanto o job esperava um worker """
+
+
+def validate_generated_code(code):
+    """ Valida o código gerado contra as listas de nós, atributos e módulos permitidos """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return False, str(e)
+    dynamic = _dynamic_names(tree)
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            return False, f"Construção '{type(node).__name__}' não permitida"
+        if isinstance(node, ast.Name) and (node.id in BLOCKED_NAMES or node.id.startswith('__')):
+            return False, f"Uso de '{node.id}' não permitido"
+        if isinstance(node, ast.Attribute) and node.attr not in ALLOWED_ATTRIBUTES:
+            return False, f"Acesso a '.{node.attr}' não permitido"
+        if isinstance(node, ast.keyword) and node.arg in BLOCKED_KEYWORDS:
+            return False, f"Argumento '{node.arg}' não permitido"
+        if isinstance(node, ast.Constant) and isinstance(node.value, str) and blocked_string(node.value):
+            return False, f"Texto '{node.value}' não permitido"
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in STRING_DISPATCH
+                and not all(_static(arg, dynamic) for arg in node.args + [kw.value for kw in node.keywords])):
+            # O nome do método chamado precisa estar escrito no código, onde já foi validado
+            return False, f"Argumento calculado em '.{node.func.attr}()' não permitido"
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.name not in ALLOWED_MODULES:
+                    return False, f"Importação de '{alias.name}' não permitida"
+        elif isinstance(node, ast.ImportFrom):
+            if node.module not in ALLOWED_MODULES or node.level:
+                return False, f"Importação de '{node.module}' não permitida"
+            for alias in node.names:
+                # `from numpy import load` equivale a `numpy.load`
+                if f'{node.module}.{alias.name}' not in ALLOWED_MODULES and alias.name not in ALLOWED_ATTRIBUTES:
+                    return False, f"Importação de '{node.module}.{alias.name}' não permitida"
+    return True, None
+
+
+class SandboxPool:
+    """ Pool de processos pré-aquecidos que já têm os datasets carregados """
+
+    def __init__(self, size=SANDBOX_WORKERS, datasets=SANDBOX_DATASETS, timeout=SANDBOX_TIMEOUT,
+                 cpu_seconds=SANDBOX_CPU_SECONDS, memory_limit_mb=SANDBOX_MEMORY_MB):
+        # spawn: não herda as threads do servidor Streamlit
+        self._context = multiprocessing.get_context('spawn')
+        self._datasets = tuple(datasets)
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_limit_mb = memory_limit_mb
+        # Versões dos snapshots que os workers carregaram
+        self.versions = tuple(snapshot_version(name) for name in self._datasets)
+        self._closed = False
+        self._lock = threading.Lock()
+        self._idle = queue.Queue()
+        for _ in range(size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=worker_main,
+            args=(child_conn, self._datasets, self.memory_limit_mb),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    def _replace(self, worker):
+        process, conn = worker
+        if process.is_alive():
+            process.kill()
+        process.join()
+        conn.close()
+        return self._spawn()
+
+    def run(self, code, timeout=None):
+        """ Executa o código em um worker livre; retorna (tipo, resultado, saída de print) """
+        is_valid, error_msg = validate_generated_code(code)
+        if not is_valid:
+            raise SandboxError(error_msg)
+
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._idle.get()
+        if self._closed:
+            # Devolve o worker para liberar o próximo job que espera neste pool
+            self._idle.put(worker)
+            raise _PoolClosed()
+        try:
+            if not worker[0].is_alive():
+                worker = self._replace(worker)
+            process, conn = worker
+            conn.send((code, self.cpu_seconds))
+            if not conn.poll(timeout):
+                # Job travado: o worker é descartado e substituído por um novo
+                worker = self._replace(worker)
+                raise SandboxError(f'Tempo limite de {timeout:.0f}s excedido.')
+            try:
+                status, kind, payload, output = conn.recv()
+            except (EOFError, OSError):
+                # O worker morreu (limite de CPU ou memória do sistema)
+                worker = self._replace(worker)
+                raise SandboxError('A execução excedeu os limites de CPU ou memória.')
+        finally:
+            with self._lock:
+                if self._closed:
+                    # Pool substituído durante o job: o worker com os dados antigos é encerrado
+                    worker[0].kill()
+                self._idle.put(worker)
+
+        if status != 'ok':
+            raise SandboxError(payload)
+        return kind, payload, output
+
+    def close(self):
+        """ Encerra os workers livres; os que estão executando são encerrados ao terminar o job """
+        with self._lock:
+            self._closed = True
+            workers = []
+            while not self._idle.empty():
+                workers.append(self._idle.get_nowait())
+            for worker in workers:
+                worker[0].kill()
+                self._idle.put(worker)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool():
+    """ Pool compartilhado por todas as sessões; recriado quando os snapshots dos datasets mudam """
+    global _pool
+    # Os workers leem os snapshots locais: revalida-os com a origem (no máximo uma vez por CACHE_TTL ou
+    # após "Atualizar dados") para que o código gerado não rode sobre dados antigos
+    from dataframe import PREVISOES_INTERNAS, refresh_snapshots
+    # Com as previsões geradas no app não há CSV de 'previsoes' a revalidar
+    refresh_snapshots(name for name in SANDBOX_DATASETS if not (name == 'previsoes' and PREVISOES_INTERNAS))
+    versions = tuple(snapshot_version(name) for name in SANDBOX_DATASETS)
+    with _pool_lock:
+        if _pool is None or _pool.versions != versions:
+            old, _pool = _pool, SandboxPool()
+            if old is not None:
+                old.close()
+        return _pool
+
+
+def run_generated_code(code, timeout=None):
+    """ Executa o código gerado no sandbox e retorna o resultado já desserializado """
+    while True:
+        try:
+            kind, payload, output = get_sandbox_pool().run(code, timeout)
+            break
+        except _PoolClosed:
+            continue
+    if kind == 'plotly':
+        import plotly.io as pio
+        return pio.from_json(payload), output
+    return payload, output
+
+
+def render_result(result):
+    """ Exibe o resultado conforme o tipo (DataFrame, gráfico, imagem, dict ou escalar) """
+    if isinstance(result, pd.DataFrame):
+        st.write(result)
+    elif type(result).__module__.startswith('plotly'):
+        st.plotly_chart(result)
+    elif isinstance(result, bytes):
+        st.image(result)
+    elif isinstance(result, dict):
+        st.write(pd.DataFrame([result]))
+    else:
+        st.write(result)
@@ -0,0 +1,107 @@
+import functools
+import threading
+
+from cachetools import TTLCache
+from decouple import config
+
+from snapshot_store import dataset_source, refresh_snapshot, snapshot_version
+
+CACHE_TTL = config('STOCKON_CACHE_TTL', default=600, cast=int)
+CACHE_MAX_ENTRIES = config('STOCKON_CACHE_MAX_ENTRIES', default=32, cast=int)
+
+
+class DataCache:
+    """ Cache TTL limitado em tamanho, compartilhado por todas as sessões do processo """
+
+    def __init__(self, ttl=CACHE_TTL, maxsize=CACHE_MAX_ENTRIES):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key, loader, version=None, copy=True):
+        """ Retorna uma cópia do valor em cache ou executa `loader` uma única vez por chave.
+
+        `version` é uma função que devolve a versão atual da origem; uma entrada
+        gravada com outra versão é tratada como ausente. Com `copy=False` o valor
+        é compartilhado entre as sessões e deve ser tratado como somente leitura.
+        """
+        current = version() if version else None
+        with self._lock:
+            value = self._lookup(key, current)
+            if value is not None:
+                return value.copy() if copy else value
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Sessões concorrentes pedindo a mesma chave esperam o primeiro carregamento
+        with key_lock:
+            with self._lock:
+                value = self._lookup(key, current)
+                if value is not None:
+                    return value.copy() if copy else value
+                self.misses += 1
+            value = loader()
+            with self._lock:
+                self._entries[key] = (version() if version else None, value)
+                self._key_locks.pop(key, None)
+        # Cópia para que alterações feitas por uma sessão não vazem para as outras
+        return value.copy() if copy else value
+
+    def _lookup(self, key, current):
+        entry = self._entries.get(key)
+        if entry is None or (current and entry[0] != current):
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def invalidate(self, name=None):
+        """ Remove do cache um dataset (pelo nome) ou todos """
+        with self._lock:
+            for key in list(self._entries.keys()):
+                if name is None or key[0] == name:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'maxsize': self._entries.maxsize,
+                'ttl': self._entries.ttl,
+            }
+
+
+DATA_CACHE = DataCache()
+
+# Specs de gráficos prontas, por versão dos dados e id do gráfico
+FIGURE_CACHE = DataCache(maxsize=config('STOCKON_FIGURE_CACHE_MAX_ENTRIES', default=64, cast=int))
+
+
+def cached_dataset(name):
+    """ Decorador que guarda o resultado do loader no cache, com chave (dataset, origem) validada pela versão do snapshot """
+    def decorator(loader):
+        @functools.wraps(loader)
+        def wrapper():
+            key = (name, dataset_source(name))
+            return DATA_CACHE.get_or_load(key, loader, version=lambda: snapshot_version(name))
+        return wrapper
+    return decorator
+
+
+def revalidated_snapshot(name, parse_dates=()):
+    """ Revalida o snapshot local com a origem no máximo uma vez por CACHE_TTL (ou após refresh_data) e
+    retorna a versão dele, sem carregar o dataframe """
+    key = (name, dataset_source(name), 'snapshot')
+    return DATA_CACHE.get_or_load(key, lambda: refresh_snapshot(name, parse_dates)['sha256'][:12],
+                                  version=lambda: snapshot_version(name), copy=False)
+
+
+def refresh_data(name=None):
+    """ Descarta os dados em cache; a próxima leitura revalida a origem """
+    DATA_CACHE.invalidate(name)
+
+
+def cache_stats():
+    return DATA_CACHE.stats()
@@ -1,39 +1,97 @@
-import pandas as pd
-import urllib.request
-import streamlit as st
-
-# @st.cache_data
-def load_data_from_url(url):
-    response = urllib.request.urlopen(url)
-    return pd.read_csv(response)
-
-def load_df_compras():
-    url = 'https://raw.githubusercontent.com/TabathaLarissa/AppStockON/main/df_compras.csv'
-    df_compras = load_data_from_url(url)
-    df_compras['Data'] = pd.to_datetime(df_compras['Data'])
-    return df_compras
-
-def load_df_final():
-    url = 'https://raw.githubusercontent.com/TabathaLarissa/AppStockON/main/df_final.csv'
-    df_final = load_data_from_url(url)
-    df_final['Valor_Total_Compra'] = df_final['Custo_Unitario'] * df_final['Sugestao_Compra']
-    return df_final
-
-def load_df_produtos():
-    url = 'https://raw.githubusercontent.com/TabathaLarissa/AppStockON/main/df_produtos.csv'
-    return load_data_from_url(url)
-
-def load_df_vendas_estoque():
-    url = 'https://raw.githubusercontent.com/TabathaLarissa/AppStockON/main/df_vendas_estoque.csv'
-    df_vendas_estoque = load_data_from_url(url)
-    df_vendas_estoque['Data'] = pd.to_datetime(df_vendas_estoque['Data'])
-    return df_vendas_estoque
-
-def load_previsoes():
-    url = 'https://raw.githubusercontent.com/TabathaLarissa/AppStockON/main/previsoes.csv'
-    return load_data_from_url(url)
-
-def load_sugestoes():
-    url = 'https://raw.githubusercontent.com/TabathaLarissa/AppStockON/main/sugestoes.csv'
-    return load_data_from_url(url)
-
+import hashlib
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from decouple import config
+from snapshot_store import load_snapshot
+from data_cache import cached_dataset, revalidated_snapshot
+
+# Colunas convertidas para data ao gravar o snapshot de cada dataset
+PARSE_DATES = {'df_compras': ['Data'], 'df_vendas_estoque': ['Data'], 'previsoes': ['Data']}
+
+@cached_dataset('df_compras')
+def load_df_compras():
+    return load_snapshot('df_compras', parse_dates=PARSE_DATES['df_compras'])
+
+@cached_dataset('df_final')
+def load_df_final():
+    df_final = load_snapshot('df_final')
+    df_final['Valor_Total_Compra'] = df_final['Custo_Unitario'] * df_final['Sugestao_Compra']
+    return df_final
+
+@cached_dataset('df_produtos')
+def load_df_produtos():
+    return load_snapshot('df_produtos')
+
+@cached_dataset('df_vendas_estoque')
+def load_df_vendas_estoque():
+    return load_snapshot('df_vendas_estoque', parse_dates=PARSE_DATES['df_vendas_estoque'])
+
+# Gera 'previsoes' no próprio app a partir do histórico de vendas, em vez de ler o CSV
+PREVISOES_INTERNAS = config('STOCKON_PREVISOES_INTERNAS', default=False, cast=bool)
+
+@cached_dataset('previsoes')
+def load_previsoes_snapshot():
+    return load_snapshot('previsoes', parse_dates=PARSE_DATES['previsoes'])
+
+def load_previsoes():
+    if PREVISOES_INTERNAS:
+        from forecasting import forecast_previsoes
+        return forecast_previsoes(load_df_vendas_estoque())
+    return load_previsoes_snapshot()
+
+@cached_dataset('sugestoes')
+def load_sugestoes():
+    return load_snapshot('sugestoes')
+
+DATASET_LOADERS = {
+    'df_compras': load_df_compras,
+    'df_final': load_df_final,
+    'df_produtos': load_df_produtos,
+    'df_vendas_estoque': load_df_vendas_estoque,
+    'previsoes': load_previsoes,
+    'sugestoes': load_sugestoes,
+}
+
+# Limite de downloads simultâneos (tamanho do pool de conexões)
+MAX_CONCURRENT_FETCHES = config('STOCKON_MAX_CONCURRENT_FETCHES', default=4, cast=int)
+
+def load_all(names=tuple(DATASET_LOADERS), max_workers=MAX_CONCURRENT_FETCHES):
+    """ Carrega os datasets em paralelo e os retorna na ordem de `names`.
+
+    Para testes, aponte STOCKON_DATA_SOURCE para um servidor local,
+    ex.: `python -m http.server 8000 -d pasta_csv` e STOCKON_DATA_SOURCE=http://127.0.0.1:8000
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(names)))) as pool:
+        futures = [pool.submit(DATASET_LOADERS[name]) for name in names]
+        return tuple(future.result() for future in futures)
+
+def load_datasets(names):
+    """ Carrega em paralelo só os datasets em `names`; retorna {nome: dataframe} """
+    names = tuple(names)
+    if not names:
+        return {}
+    return dict(zip(names, load_all(names)))
+
+def refresh_snapshots(names, max_workers=MAX_CONCURRENT_FETCHES):
+    """ Revalida em paralelo os snapshots locais de `names` sem carregá-los; retorna as versões na ordem de `names` """
+    names = tuple(names)
+    if not names:
+        return ()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(names)))) as pool:
+        futures = [pool.submit(revalidated_snapshot, name, PARSE_DATES.get(name, ())) for name in names]
+        return tuple(future.result() for future in futures)
+
+def data_version(*dfs):
+    """ Retorna uma versão combinada dos dataframes (ou stores), a partir do hash dos snapshots de origem """
+    versions = []
+    for df in dfs:
+        if not isinstance(df, pd.DataFrame):
+            # Store derivado (ex.: ForecastStore): já traz a própria versão
+            versions.append(df.version)
+            continue
+        version = df.attrs.get('versao')
+        if not version:
+            # Dataframe sem snapshot de origem (ex.: dados sintéticos): usa o hash do conteúdo
+            version = hashlib.sha256(pd.util.hash_pandas_object(df).values.tobytes()).hexdigest()[:12]
+        versions.append(version)
+    return hashlib.sha256('|'.join(versions).encode()).hexdigest()[:12]
@@ -0,0 +1,94 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+# Tipos declarados por dataset, aplicados ao gravar o snapshot:
+# - 'category': textos repetidos em muitas linhas (dicionário + códigos inteiros)
+# - 'int': contagens, em int32 (ou float32 se o CSV trouxer valores fracionados ou vazios)
+# - 'float': medidas sem exigência de precisão, em float32
+# - 'money': valores em R$, mantidos em float64 para as somas não perderem centavos
+# A chave '*' vale para as demais colunas numéricas; colunas ausentes no CSV são ignoradas.
+_PRODUTO = {
+    'Produto_ID': 'int',
+    'Setor': 'category',
+    'Classificacao ABC': 'category',
+    'Classificação ABC': 'category',
+    'Criticidade': 'category',
+}
+
+SCHEMAS = {
+    # Uma linha por produto: nome e SKU são únicos e ficam como texto
+    'df_final': dict(_PRODUTO, **{
+        'Criticidade_Num': 'int',
+        'Quantidade_Estoque_Atual': 'int',
+        'Estoque_Minimo': 'int',
+        'Venda_ult_30d': 'int',
+        'Venda_ult_60': 'int',
+        'Venda_ult_90d': 'int',
+        'Lead_Time_Dias': 'int',
+        'Sugestao_Compra': 'int',
+        'Custo_Unitario': 'money',
+    }),
+    # Histórico diário: os atributos do produto se repetem em todos os dias
+    'df_vendas_estoque': dict(_PRODUTO, **{
+        'Nome_Produto2': 'category',
+        'SKU': 'category',
+        'Quantidade Vendida': 'int',
+        'Quantidade_Estoque': 'int',
+        'Ruptura_Historica': 'int',
+        '% Ruptura': 'float',
+    }),
+    'df_compras': dict(_PRODUTO, Nome_Produto2='category', SKU='category'),
+    'df_produtos': dict(_PRODUTO),
+    'sugestoes': dict(_PRODUTO, Nome_Produto2='category', SKU='category'),
+    # Uma coluna de demanda prevista por produto
+    'previsoes': {'Historico_Projecao': 'category', '*': 'float'},
+}
+
+_INT32 = np.iinfo(np.int32)
+
+
+def _as_int(series):
+    values = pd.to_numeric(series, errors='coerce')
+    if values.isna().any() or not np.array_equal(values, np.round(values)):
+        return values.astype(np.float32)
+    if len(values) and (values.min() < _INT32.min or values.max() > _INT32.max):
+        return values.astype(np.int64)
+    return values.astype(np.int32)
+
+
+def _convert(series, kind):
+    if kind == 'category':
+        return series.astype('category')
+    if kind == 'int':
+        return _as_int(series)
+    if kind == 'float':
+        return pd.to_numeric(series, errors='coerce').astype(np.float32)
+    if kind == 'money':
+        return pd.to_numeric(series, errors='coerce').astype(np.float64)
+    raise ValueError(f"Tipo '{kind}' desconhecido no schema.")
+
+
+def apply_schema(df, schema):
+    """ Converte as colunas de `df` conforme o schema declarado (retorna um novo dataframe) """
+    columns = {}
+    for column in df.columns:
+        kind = schema.get(column)
+        if kind is None and '*' in schema and pd.api.types.is_numeric_dtype(df[column]):
+            kind = schema['*']
+        if kind is not None:
+            columns[column] = _convert(df[column], kind)
+    return df.assign(**columns) if columns else df
+
+
+def schema_version(name):
+    """ Versão do schema do dataset; quando muda, o snapshot é regravado """
+    raw = json.dumps(SCHEMAS.get(name, {}), sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()[:12]
+
+
+def memory_usage(df):
+    """ Memória ocupada pelo dataframe, em bytes (incluindo o conteúdo dos textos) """
+    return int(df.memory_usage(deep=True).sum())
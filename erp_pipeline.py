@@ -0,0 +1,280 @@
+import hashlib
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from decouple import config
+
+from sqlite_store import DB_PATH, connect
+
+# Endpoint de requisições de compra do ERP; vazio = aprovações ficam na fila até ser configurado.
+# Para testes locais: python erp_stub_server.py e ERP_URL=http://127.0.0.1:8765/requisicoes
+ERP_URL = config('ERP_URL', default='')
+ERP_TOKEN = config('ERP_TOKEN', default='')
+ERP_TIMEOUT = config('ERP_TIMEOUT', default=10, cast=float)
+ERP_BATCH_SIZE = config('ERP_BATCH_SIZE', default=50, cast=int)
+ERP_BATCH_WAIT = config('ERP_BATCH_WAIT', default=2, cast=float)
+ERP_MAX_ATTEMPTS = config('ERP_MAX_ATTEMPTS', default=5, cast=int)
+ERP_BACKOFF = config('ERP_BACKOFF', default=1.0, cast=float)
+ERP_MAX_PENDING = config('ERP_MAX_PENDING', default=5000, cast=int)
+
+STATUS_LABELS = {
+    'pendente': 'Na fila do ERP',
+    'enviando': 'Enviando ao ERP',
+    'enviado': 'Enviado ao ERP',
+    'rejeitado': 'Rejeitado pelo ERP',
+    'erro': 'Falha no envio ao ERP',
+}
+
+
+class ErpBackpressure(Exception):
+    """ A fila local atingiu o limite de itens pendentes """
+
+
+class ErpError(Exception):
+    def __init__(self, message, retryable):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def idempotency_key(cycle, item_type, item_key):
+    """ Mesma aprovação no mesmo ciclo gera a mesma chave: reenvios não duplicam a requisição no ERP """
+    raw = '\x1f'.join([str(cycle), item_type, str(item_key)])
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+class ErpOutbox:
+    """ Fila durável (SQLite) das aprovações a enviar ao ERP, com o status de cada item """
+
+    def __init__(self, path=DB_PATH, max_pending=ERP_MAX_PENDING):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS erp_outbox (
+                    idempotency_key TEXT PRIMARY KEY,
+                    cycle TEXT NOT NULL,
+                    item_type TEXT NOT NULL,
+                    item_key TEXT NOT NULL,
+                    quantity REAL NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    erp_reference TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )""")
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_erp_outbox_due ON erp_outbox (status, next_attempt_at)')
+            # Itens que estavam em envio quando o processo caiu voltam para a fila (a chave evita duplicidade)
+            self._conn.execute("UPDATE erp_outbox SET status = 'pendente' WHERE status = 'enviando'")
+
+    def pending_count(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM erp_outbox WHERE status IN ('pendente', 'enviando')").fetchone()[0]
+
+    def enqueue(self, cycle, item_type, items):
+        """ Grava os itens [(chave, quantidade)] na fila; recusa tudo se passar do limite de pendentes """
+        now = time.time()
+        rows = [(idempotency_key(cycle, item_type, key), str(cycle), item_type, str(key), float(quantity),
+                 'pendente', now, now, now) for key, quantity in items]
+        with self._lock, self._conn:
+            pending = self._conn.execute(
+                "SELECT COUNT(*) FROM erp_outbox WHERE status IN ('pendente', 'enviando')").fetchone()[0]
+            if pending + len(rows) > self.max_pending:
+                raise ErpBackpressure(
+                    f'{pending} itens aguardam envio ao ERP; tente novamente em instantes.')
+            self._conn.executemany("""
+                INSERT OR IGNORE INTO erp_outbox
+                    (idempotency_key, cycle, item_type, item_key, quantity, status, next_attempt_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""", rows)
+        return [row[0] for row in rows]
+
+    def claim_batch(self, limit):
+        """ Marca como 'enviando' até `limit` itens cuja próxima tentativa já venceu """
+        now = time.time()
+        with self._lock, self._conn:
+            rows = self._conn.execute("""
+                SELECT idempotency_key, cycle, item_type, item_key, quantity FROM erp_outbox
+                WHERE status = 'pendente' AND next_attempt_at <= ?
+                ORDER BY created_at LIMIT ?""", (now, limit)).fetchall()
+            self._conn.executemany(
+                "UPDATE erp_outbox SET status = 'enviando', updated_at = ? WHERE idempotency_key = ?",
+                [(now, row[0]) for row in rows])
+        return rows
+
+    def mark_results(self, results):
+        """ Grava o retorno do ERP: [(chave, 'enviado' | 'rejeitado', referência, erro)] """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                UPDATE erp_outbox SET status = ?, erp_reference = ?, error = ?, attempts = attempts + 1,
+                    updated_at = ? WHERE idempotency_key = ?""",
+                [(status, reference, error, now, key) for key, status, reference, error in results])
+
+    def mark_failed(self, keys, error, retryable, max_attempts=ERP_MAX_ATTEMPTS, backoff=ERP_BACKOFF):
+        """ Falha do lote: volta para a fila com backoff exponencial ou desiste após `max_attempts` """
+        now = time.time()
+        with self._lock, self._conn:
+            for key in keys:
+                attempts = self._conn.execute(
+                    'SELECT attempts FROM erp_outbox WHERE idempotency_key = ?', (key,)).fetchone()[0] + 1
+                give_up = not retryable or attempts >= max_attempts
+                self._conn.execute("""
+                    UPDATE erp_outbox SET status = ?, attempts = ?, next_attempt_at = ?, error = ?, updated_at = ?
+                    WHERE idempotency_key = ?""",
+                    ('erro' if give_up else 'pendente', attempts, now + backoff * 2 ** (attempts - 1),
+                     str(error), now, key))
+
+    def retry_failed(self):
+        """ Recoloca na fila os itens que esgotaram as tentativas """
+        with self._lock, self._conn:
+            return self._conn.execute("""
+                UPDATE erp_outbox SET status = 'pendente', attempts = 0, next_attempt_at = ?
+                WHERE status = 'erro'""", (time.time(),)).rowcount
+
+    def statuses(self, cycle, item_type):
+        """ {chave do item: (status, referência, erro)} das aprovações do ciclo """
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT item_key, status, erp_reference, error FROM erp_outbox
+                WHERE cycle = ? AND item_type = ?""", (str(cycle), item_type)).fetchall()
+        return {item_key: (status, reference, error) for item_key, status, reference, error in rows}
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM erp_outbox GROUP BY status').fetchall()
+        return dict(rows)
+
+
+def post_batch(url, items, timeout=ERP_TIMEOUT, token=ERP_TOKEN):
+    """ Envia um lote de requisições de compra; retorna {chave: (status, referência, erro)} """
+    payload = {
+        'requisicoes': [
+            {'idempotency_key': key, 'ciclo': cycle, 'tipo': item_type, 'item': item_key, 'quantidade': quantity}
+            for key, cycle, item_type, item_key, quantity in items
+        ]
+    }
+    # Chave do lote: o mesmo conjunto de itens reenviado após timeout é reconhecido pelo ERP
+    batch_key = hashlib.sha256(''.join(sorted(item[0] for item in items)).encode()).hexdigest()[:32]
+    headers = {'Content-Type': 'application/json', 'Idempotency-Key': batch_key}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(), headers=headers, method='POST')
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = json.loads(response.read().decode() or '{}')
+    except urllib.error.HTTPError as e:
+        # 429 e 5xx são transitórios; demais 4xx indicam lote inválido
+        raise ErpError(f'HTTP {e.code}', retryable=e.code == 429 or e.code >= 500)
+    except (urllib.error.URLError, TimeoutError, OSError, ValueError) as e:
+        raise ErpError(str(e), retryable=True)
+
+    results = {}
+    for item in body.get('itens', []):
+        accepted = item.get('status') in ('aceito', 'duplicado')
+        results[item.get('idempotency_key')] = (
+            'enviado' if accepted else 'rejeitado', item.get('referencia'), item.get('erro'))
+    return results
+
+
+class ErpSubmitter:
+    """ Worker em segundo plano que agrupa os itens da fila em lotes e envia ao ERP """
+
+    def __init__(self, outbox, url=ERP_URL, batch_size=ERP_BATCH_SIZE, batch_wait=ERP_BATCH_WAIT,
+                 max_attempts=ERP_MAX_ATTEMPTS, backoff=ERP_BACKOFF):
+        self.outbox = outbox
+        self.url = url
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='erp-submitter', daemon=True)
+        self._thread.start()
+
+    def notify(self):
+        """ Acorda o worker após novas aprovações """
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Espera novos itens (ou o próximo retry) e dá um tempo para o lote encher
+            self._wake.wait(self.batch_wait)
+            self._wake.clear()
+            while not self._stop.is_set() and self.send_once():
+                pass
+
+    def send_once(self):
+        """ Envia um lote; retorna False quando não há itens vencidos """
+        batch = self.outbox.claim_batch(self.batch_size)
+        if not batch:
+            return False
+        keys = [row[0] for row in batch]
+        try:
+            results = post_batch(self.url, batch)
+        except ErpError as e:
+            self.outbox.mark_failed(keys, e, e.retryable, self.max_attempts, self.backoff)
+            return False
+        missing = [key for key in keys if key not in results]
+        self.outbox.mark_results([(key, *results[key]) for key in keys if key in results])
+        if missing:
+            self.outbox.mark_failed(missing, 'Item sem retorno do ERP', True, self.max_attempts, self.backoff)
+        return True
+
+
+class ErpPipeline:
+    def __init__(self, path=DB_PATH, url=ERP_URL):
+        self.outbox = ErpOutbox(path)
+        self.url = url
+        self.submitter = ErpSubmitter(self.outbox, url) if url else None
+
+    def submit(self, cycle, item_type, items):
+        """ Coloca as aprovações na fila durável e acorda o worker; pode levantar ErpBackpressure """
+        keys = self.outbox.enqueue(cycle, item_type, items)
+        if self.submitter is not None:
+            self.submitter.notify()
+        return keys
+
+    def retry_failed(self):
+        count = self.outbox.retry_failed()
+        if self.submitter is not None:
+            self.submitter.notify()
+        return count
+
+    def item_status(self, cycle, item_type):
+        """ {chave do item: texto do status} para exibir na tabela de aprovações """
+        labels = {}
+        for item_key, (status, reference, error) in self.outbox.statuses(cycle, item_type).items():
+            label = STATUS_LABELS[status]
+            if status == 'enviado' and reference:
+                label += f' (req. {reference})'
+            elif status in ('rejeitado', 'erro') and error:
+                label += f': {error}'
+            elif status == 'pendente' and self.submitter is None:
+                label += ' (ERP não configurado)'
+            labels[item_key] = label
+        return labels
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_erp_pipeline():
+    """ Pipeline único por processo: uma fila e um worker compartilhados por todas as sessões """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = ErpPipeline()
+        return _pipeline
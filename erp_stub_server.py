@@ -0,0 +1,93 @@
+# Servidor local que imita o endpoint de requisições de compra do ERP, para testar o envio das aprovações.
+# Uso: python erp_stub_server.py --port 8765 [--fail-rate 0.2] [--latency 0.5]
+# e no .env: ERP_URL=http://127.0.0.1:8765/requisicoes
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class ErpState:
+    def __init__(self, fail_rate=0.0, latency=0.0):
+        self.fail_rate = fail_rate
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.references = {}  # idempotency_key -> número da requisição
+        self.requests = 0
+
+    def register(self, item):
+        """ Cria a requisição ou devolve a já existente para a mesma chave """
+        key = item.get('idempotency_key')
+        if not key:
+            return {'idempotency_key': key, 'status': 'rejeitado', 'erro': 'Chave de idempotência ausente'}
+        if not isinstance(item.get('quantidade'), (int, float)) or item['quantidade'] < 0:
+            return {'idempotency_key': key, 'status': 'rejeitado', 'erro': 'Quantidade inválida'}
+        with self.lock:
+            if key in self.references:
+                return {'idempotency_key': key, 'status': 'duplicado', 'referencia': self.references[key]}
+            reference = f'RC{len(self.references) + 1:08d}'
+            self.references[key] = reference
+        return {'idempotency_key': key, 'status': 'aceito', 'referencia': reference}
+
+
+def make_handler(state):
+    class ErpHandler(BaseHTTPRequestHandler):
+        def _reply(self, code, body):
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            if self.path.rstrip('/') != '/requisicoes':
+                return self._reply(404, {'erro': 'Não encontrado'})
+            with state.lock:
+                state.requests += 1
+            if state.latency:
+                time.sleep(state.latency)
+            if random.random() < state.fail_rate:
+                return self._reply(503, {'erro': 'Indisponível'})
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length).decode())
+                items = payload['requisicoes']
+            except (ValueError, KeyError):
+                return self._reply(400, {'erro': 'Payload inválido'})
+            self._reply(200, {'itens': [state.register(item) for item in items]})
+
+        def do_GET(self):
+            with state.lock:
+                self._reply(200, {'requisicoes': len(state.references), 'chamadas': state.requests})
+
+        def log_message(self, format, *args):
+            pass
+
+    return ErpHandler
+
+
+def serve(host='127.0.0.1', port=8765, fail_rate=0.0, latency=0.0):
+    """ Sobe o servidor em uma thread e retorna (servidor, estado) """
+    state = ErpState(fail_rate, latency)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='ERP local para testes do envio de aprovações')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='fração de lotes respondidos com 503')
+    parser.add_argument('--latency', type=float, default=0.0, help='atraso por lote, em segundos')
+    args = parser.parse_args()
+    server, _ = serve(args.host, args.port, args.fail_rate, args.latency)
+    print(f'ERP local em http://{args.host}:{args.port}/requisicoes')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,21 @@
+def forecast_figure(store, product, width=700, height=400):
+    """ Gráfico Histórico vs Projeção do produto, renderizado no navegador pelo plotly """
+    import plotly.graph_objects as go
+
+    (hist_dates, hist_values), (proj_dates, proj_values) = store.series(product)
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=hist_dates, y=hist_values, name='Histórico', mode='lines',
+                             line=dict(color='blue')))
+    fig.add_trace(go.Scatter(x=proj_dates, y=proj_values, name='Projeção', mode='lines',
+                             line=dict(color='red', dash='dash')))
+    fig.update_layout(
+        title_text=f'Histórico e Projeção para {product}',
+        xaxis=dict(title='Data', tickformat='%d-%m', dtick=2 * 86_400_000, tickangle=-90, showgrid=True),
+        yaxis=dict(title='Valor', showgrid=True),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        hovermode="x",
+        width=width,
+        height=height
+    )
+    return fig
@@ -0,0 +1,84 @@
+# Modelos de previsão vetorizados entre SKUs. Só depende do NumPy para que os processos do pool
+# de ajuste subam rápido; a montagem da tabela 'previsoes' fica em forecasting.py
+import numpy as np
+
+# Grade de constantes de suavização testadas por SKU
+ALPHAS = np.array([0.05, 0.1, 0.2, 0.3, 0.5])
+# Intervalo médio entre vendas acima do qual a demanda é tratada como intermitente (Syntetos-Boylan)
+ADI_INTERMITENTE = 1.32
+# Dias usados para iniciar o nível da suavização exponencial
+DIAS_INICIO = 7
+
+
+def _best(sse, alphas, *states):
+    """ Escolhe, por SKU, o alpha de menor erro e o estado correspondente """
+    best = np.argmin(sse, axis=0)
+    cols = np.arange(sse.shape[1])
+    return (alphas[best],) + tuple(state[best, cols] for state in states)
+
+
+def ses_fit(y, alphas=ALPHAS):
+    """ Suavização exponencial simples para a matriz y (dias x SKUs); retorna (alpha, nível) por SKU """
+    a = alphas[:, None]
+    level = np.repeat(y[:DIAS_INICIO].mean(axis=0)[None, :], len(alphas), axis=0)
+    sse = np.zeros_like(level)
+    for t in range(1, len(y)):
+        err = y[t] - level
+        sse += err * err
+        level += a * err
+    return _best(sse, alphas, level)
+
+
+def croston_fit(y, alphas=ALPHAS):
+    """ Croston com correção SBA; retorna (alpha, tamanho médio, intervalo médio, dias desde a última venda) """
+    a = alphas[:, None]
+    n_days, n_skus = y.shape
+    vendas = (y > 0).sum(axis=0)
+    # Início pelas médias do período: tamanho médio das vendas e intervalo médio entre elas
+    z = np.repeat((y.sum(axis=0) / np.maximum(vendas, 1))[None, :], len(alphas), axis=0)
+    p = np.repeat((n_days / np.maximum(vendas, 1))[None, :], len(alphas), axis=0)
+    q = np.ones((len(alphas), n_skus))
+    sse = np.zeros_like(z)
+    for t in range(n_days):
+        err = y[t] - (1 - a / 2) * z / p
+        sse += err * err
+        venda = y[t] > 0
+        z = np.where(venda, z + a * (y[t] - z), z)
+        p = np.where(venda, p + a * (q - p), p)
+        q = np.where(venda, 1.0, q + 1)
+    return _best(sse, alphas, z, p, q)
+
+
+def fit_models(y, alphas=ALPHAS):
+    """ Ajusta os dois modelos para todos os SKUs de y (dias x SKUs); retorna o estado em arrays """
+    y = np.asarray(y, dtype=np.float64)
+    ses_alpha, level = ses_fit(y, alphas)
+    cr_alpha, z, p, q = croston_fit(y, alphas)
+    return {
+        'ses_alpha': ses_alpha, 'level': level,
+        'cr_alpha': cr_alpha, 'z': z, 'p': p, 'q': q,
+        'dias': np.full(y.shape[1], float(len(y))), 'vendas': (y > 0).sum(axis=0).astype(np.float64),
+    }
+
+
+def update_state(state, y_t):
+    """ Incorpora um dia de vendas (vetor por SKU) ao estado já ajustado, sem refazer o ajuste """
+    state['level'] += state['ses_alpha'] * (y_t - state['level'])
+    venda = y_t > 0
+    a = state['cr_alpha']
+    state['z'] = np.where(venda, state['z'] + a * (y_t - state['z']), state['z'])
+    state['p'] = np.where(venda, state['p'] + a * (state['q'] - state['p']), state['p'])
+    state['q'] = np.where(venda, 1.0, state['q'] + 1)
+    state['dias'] += 1
+    state['vendas'] += venda
+
+
+def intermittent(state):
+    """ SKUs com demanda intermitente (intervalo médio entre vendas acima do limite) """
+    return state['dias'] / np.maximum(state['vendas'], 1) >= ADI_INTERMITENTE
+
+
+def point_forecast(state):
+    """ Previsão diária por SKU: Croston/SBA para os intermitentes, suavização exponencial para os demais """
+    croston = (1 - state['cr_alpha'] / 2) * state['z'] / state['p']
+    return np.maximum(np.where(intermittent(state), croston, state['level']), 0)
@@ -0,0 +1,203 @@
+import glob
+import hashlib
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+from decouple import config
+
+from data_cache import DATA_CACHE
+from dataframe import PREVISOES_INTERNAS, data_version, load_previsoes, refresh_snapshots
+from snapshot_store import SNAPSHOT_DIR, read_snapshot_columns, snapshot_columns
+
+# 'previsoes' em formato longo (Produto_ID, Data, Historico_Projecao, Valor), em arquivos com blocos de produtos
+FORECAST_STORE_DIR = os.path.join(SNAPSHOT_DIR, 'previsoes_long')
+# Produtos por arquivo: ler um produto mapeia só o arquivo dele
+FORECAST_STORE_CHUNK = config('STOCKON_FORECAST_STORE_CHUNK', default=1000, cast=int)
+# Versões mantidas em disco
+FORECAST_STORE_KEEP = config('STOCKON_FORECAST_STORE_KEEP', default=3, cast=int)
+
+KEY_COLUMNS = ['Data', 'Historico_Projecao']
+
+
+def _part_path(path, part):
+    return os.path.join(path, f'part-{part:05d}.feather')
+
+
+def _frame_blocks(previsoes, chunk=FORECAST_STORE_CHUNK):
+    """ Blocos de `chunk` colunas de produto da tabela larga já carregada """
+    products = previsoes.columns.drop(KEY_COLUMNS).tolist()
+    for start in range(0, len(products), chunk):
+        yield previsoes[KEY_COLUMNS + products[start:start + chunk]]
+
+
+def _snapshot_blocks(name, chunk=FORECAST_STORE_CHUNK):
+    """ Blocos de colunas lidos direto do snapshot, sem carregar a tabela larga inteira """
+    products = [col for col in snapshot_columns(name) if col not in KEY_COLUMNS]
+    for start in range(0, len(products), chunk):
+        yield read_snapshot_columns(name, KEY_COLUMNS + products[start:start + chunk])
+
+
+def write_forecast_store(blocks, path):
+    """ Grava os blocos largos em formato longo, com o índice de produtos e os totais por dia """
+    tmp = path + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    index, totals = [], None
+    for part, block in enumerate(blocks):
+        products = block.columns.drop(KEY_COLUMNS).astype(str)
+        n_days = len(block)
+        flag = block['Historico_Projecao'].to_numpy()
+        # Transposta: a série de cada produto fica contígua no arquivo
+        values = block.drop(columns=KEY_COLUMNS).to_numpy(dtype=np.float64).T
+        long = pd.DataFrame({
+            'Produto_ID': np.repeat(products.to_numpy(), n_days),
+            'Data': np.tile(pd.to_datetime(block['Data']).to_numpy(), len(products)),
+            'Historico_Projecao': pd.Categorical(np.tile(flag, len(products))),
+            'Valor': values.ravel(),
+        })
+        feather.write_feather(long, _part_path(tmp, part), compression='uncompressed')
+
+        index.append(pd.DataFrame({
+            'Produto_ID': products,
+            'part': part,
+            'offset': np.arange(len(products)) * n_days,
+            'length': n_days,
+            'Venda_proj_30d': values[:, flag == 'Projecao'].sum(axis=1),
+        }))
+        day_totals = values.sum(axis=0)
+        if totals is None:
+            totals = pd.DataFrame({'Data': pd.to_datetime(block['Data']).to_numpy(), 'Historico_Projecao': flag,
+                                   'Valor': day_totals})
+        else:
+            totals['Valor'] += day_totals
+
+    feather.write_feather(pd.concat(index, ignore_index=True), os.path.join(tmp, 'index.feather'),
+                          compression='uncompressed')
+    feather.write_feather(totals, os.path.join(tmp, 'totals.feather'), compression='uncompressed')
+    if os.path.exists(path):
+        # Outra sessão gravou a mesma versão antes
+        shutil.rmtree(tmp, ignore_errors=True)
+    else:
+        os.replace(tmp, path)
+
+
+class ForecastStore:
+    """ Leitura de 'previsoes' em formato longo: série de um produto, totais por dia e por Setor """
+
+    def __init__(self, path):
+        self.path = path
+        # Cada versão de 'previsoes' tem a sua pasta: o nome dela é a versão do store
+        self.version = os.path.basename(path)
+        self._lock = threading.Lock()
+        self._values = {}
+        self._index = feather.read_feather(os.path.join(path, 'index.feather')).set_index('Produto_ID')
+        self.products = self._index.index.tolist()
+
+        # Todos os produtos compartilham as mesmas datas; ficam só nos totais
+        self._totals = feather.read_feather(os.path.join(path, 'totals.feather'))
+        self.dates = self._totals['Data'].to_numpy()
+        flag = self._totals['Historico_Projecao'].to_numpy()
+        self._hist_rows = np.flatnonzero(flag == 'Historico')
+        # Fazendo a projeção começar do último ponto do histórico
+        self._proj_rows = np.concatenate([self._hist_rows[-1:], np.flatnonzero(flag == 'Projecao')])
+
+    def _part_values(self, part):
+        """ Coluna Valor do arquivo, mapeada em memória e lida uma vez """
+        with self._lock:
+            if part not in self._values:
+                table = feather.read_table(_part_path(self.path, part), columns=['Valor'], memory_map=True)
+                self._values[part] = table.column('Valor').to_numpy()
+            return self._values[part]
+
+    def values(self, product):
+        """ Valores diários do produto (histórico seguido da projeção), sem ler os demais arquivos """
+        part, offset, length = self._index.loc[str(product), ['part', 'offset', 'length']]
+        return self._part_values(int(part))[int(offset):int(offset) + int(length)]
+
+    def series(self, product):
+        """ Retorna ((datas, valores) do histórico, (datas, valores) da projeção) do produto """
+        values = self.values(product)
+        return (
+            (self.dates[self._hist_rows], values[self._hist_rows]),
+            (self.dates[self._proj_rows], values[self._proj_rows]),
+        )
+
+    def frame(self, product):
+        """ Série do produto em formato longo: Data, Historico_Projecao e Valor """
+        return self._totals[KEY_COLUMNS].assign(Valor=self.values(product))
+
+    def totals_by_day(self):
+        """ Demanda somada de todos os produtos por dia: Data, Historico_Projecao e Valor """
+        return self._totals.copy()
+
+    def projection_by_product(self):
+        """ Venda projetada no horizonte por Produto_ID (Series indexada por Produto_ID em texto) """
+        return self._index['Venda_proj_30d']
+
+    def by_setor(self, df_final, setor=None):
+        """ Demanda por Setor e dia (Setor, Data, Historico_Projecao, Valor); com `setor`, lê só os produtos dele """
+        setores = pd.Series(df_final['Setor'].to_numpy(), index=df_final['Produto_ID'].astype(str))
+        setores = setores[~setores.index.duplicated()]
+        if setor is not None:
+            setores = setores[setores == setor]
+        rows = self._index.join(setores.rename('Setor'), how='inner')
+        n_days = len(self.dates)
+        frames = []
+        for part, grupo in rows.groupby('part'):
+            values = self._part_values(int(part))
+            # Matriz (produtos do grupo x dias) a partir das fatias contíguas de cada produto
+            series = np.stack([values[offset:offset + n_days] for offset in grupo['offset']])
+            somas = pd.DataFrame(series).groupby(grupo['Setor'].to_numpy()).sum()
+            frames.append(somas)
+        if not frames:
+            return pd.DataFrame(columns=['Setor'] + KEY_COLUMNS + ['Valor'])
+        somas = pd.concat(frames).groupby(level=0).sum()
+        long = somas.stack().rename_axis(['Setor', 'dia']).rename('Valor').reset_index()
+        long['Data'] = self.dates[long['dia']]
+        long['Historico_Projecao'] = self._totals['Historico_Projecao'].to_numpy()[long['dia']]
+        return long[['Setor'] + KEY_COLUMNS + ['Valor']]
+
+    def wide(self, products=None):
+        """ Tabela larga no formato do CSV (uma coluna por produto); monte só quando precisar dela inteira """
+        products = self.products if products is None else [str(p) for p in products]
+        wide = pd.DataFrame({product: self.values(product) for product in products})
+        wide.insert(0, 'Data', self.dates)
+        wide.insert(1, 'Historico_Projecao', self._totals['Historico_Projecao'].to_numpy())
+        return wide
+
+
+def open_forecast_store(version, blocks):
+    """ Abre o store gravado para `version` ou o constrói a partir de `blocks()` """
+    path = os.path.join(FORECAST_STORE_DIR, version)
+    if not os.path.exists(os.path.join(path, 'index.feather')):
+        os.makedirs(FORECAST_STORE_DIR, exist_ok=True)
+        write_forecast_store(blocks(), path)
+        # Sessões abertas podem ainda ler a versão anterior: mantém as mais recentes
+        versions = [p for p in glob.glob(os.path.join(FORECAST_STORE_DIR, '*')) if not p.endswith('.tmp')]
+        for old in sorted(versions, key=os.path.getmtime)[:-FORECAST_STORE_KEEP]:
+            shutil.rmtree(old, ignore_errors=True)
+    return ForecastStore(path)
+
+
+def get_forecast_store(previsoes=None):
+    """ Store da versão atual de 'previsoes', compartilhado entre as sessões.
+
+    Sem `previsoes`, usa o snapshot local lido em blocos de colunas, sem carregar a tabela larga.
+    """
+    if previsoes is None and not PREVISOES_INTERNAS:
+        # Revalida a origem como os demais datasets (no máximo uma vez por CACHE_TTL ou após "Atualizar dados")
+        snapshot, = refresh_snapshots(('previsoes',))
+        # Mesma versão que data_version() daria ao dataframe lido do snapshot
+        version = hashlib.sha256(snapshot.encode()).hexdigest()[:12]
+        blocks = lambda: _snapshot_blocks('previsoes')
+    else:
+        if previsoes is None:
+            previsoes = load_previsoes()
+        version = data_version(previsoes)
+        blocks = lambda: _frame_blocks(previsoes)
+    return DATA_CACHE.get_or_load(('forecast_store', version), lambda: open_forecast_store(version, blocks),
+                                  copy=False)
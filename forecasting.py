@@ -0,0 +1,140 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from decouple import config
+
+from data_cache import DATA_CACHE
+from dataframe import data_version
+from forecast_models import fit_models, point_forecast, update_state
+
+FORECAST_HORIZON = config('STOCKON_FORECAST_HORIZON', default=30, cast=int)
+# Dias de histórico repetidos na tabela 'previsoes' (linhas 'Historico')
+FORECAST_HISTORY_DAYS = config('STOCKON_FORECAST_HISTORY_DAYS', default=60, cast=int)
+FORECAST_WORKERS = config('STOCKON_FORECAST_WORKERS', default=os.cpu_count() or 1, cast=int)
+# SKUs por tarefa do pool; abaixo disso o ajuste roda no próprio processo
+FORECAST_CHUNK = config('STOCKON_FORECAST_CHUNK', default=2000, cast=int)
+
+
+def daily_sales_matrix(df_vendas_estoque):
+    """ Vendas diárias em matriz (dias x produtos), com os dias sem registro preenchidos com zero """
+    diario = df_vendas_estoque.pivot_table(index='Data', columns='Produto_ID', values='Quantidade Vendida',
+                                           aggfunc='sum')
+    dates = pd.date_range(diario.index.min(), diario.index.max(), freq='D')
+    diario = diario.reindex(dates).fillna(0)
+    return dates, diario.columns, diario.to_numpy(dtype=np.float64)
+
+
+def fit_parallel(values, workers=FORECAST_WORKERS, chunk=FORECAST_CHUNK):
+    """ Ajusta os modelos por blocos de SKUs em um pool de processos e junta os estados """
+    n_skus = values.shape[1]
+    if workers <= 1 or n_skus <= chunk:
+        return fit_models(values)
+    blocks = [np.ascontiguousarray(values[:, start:start + chunk]) for start in range(0, n_skus, chunk)]
+    # spawn: não herda as threads do servidor Streamlit
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        states = list(pool.map(fit_models, blocks))
+    return {key: np.concatenate([state[key] for state in states]) for key in states[0]}
+
+
+class ForecastEngine:
+    """ Gera a tabela 'previsoes' (uma coluna por Produto_ID) a partir do histórico diário de vendas """
+
+    def __init__(self, df_vendas_estoque, workers=FORECAST_WORKERS, history_days=FORECAST_HISTORY_DAYS):
+        self._lock = threading.Lock()
+        dates, self.products, values = daily_sales_matrix(df_vendas_estoque)
+        self._position = pd.Index(self.products.astype(str))
+        self.state = fit_parallel(values, workers)
+        self.history_days = history_days
+        self.history = values[-history_days:].copy()
+        self.dates = dates[-history_days:]
+        self.last_date = dates[-1]
+        # Versão do histórico do último ajuste completo e dias incorporados depois dele (entram na versão da tabela)
+        self.fit_version = data_version(df_vendas_estoque)
+        self.source_version = self.fit_version
+        self.revision = 0
+
+    def append_day(self, date, vendas):
+        """ Novo dia de vendas (Series indexada por Produto_ID): atualiza o estado sem reajustar os modelos """
+        y = np.zeros(len(self.products))
+        pos = self._position.get_indexer(vendas.index.astype(str))
+        ok = pos >= 0
+        # Produtos novos, sem histórico, só entram no próximo ajuste completo
+        np.add.at(y, pos[ok], vendas.to_numpy(dtype=np.float64)[ok])
+        with self._lock:
+            update_state(self.state, y)
+            self.history = np.vstack([self.history, y])[-self.history_days:]
+            self.dates = self.dates.append(pd.DatetimeIndex([pd.Timestamp(date)]))[-self.history_days:]
+            self.last_date = pd.Timestamp(date)
+            self.revision += 1
+
+    def extend(self, df_vendas_estoque):
+        """ Incorpora os dias posteriores ao último visto com append_day (warm start).
+
+        O histórico é tratado como uma continuação (só ganha dias novos); retorna False quando não é
+        (nenhum dia novo, lacuna antes do primeiro dia novo ou produtos sem ajuste) e o motor precisa ser refeito.
+        """
+        datas = df_vendas_estoque['Data']
+        novos = df_vendas_estoque[datas > self.last_date]
+        if novos.empty or datas.min() > self.last_date:
+            return False
+        if not pd.Index(novos['Produto_ID'].unique()).astype(str).isin(self._position).all():
+            return False
+        diario = novos.pivot_table(index='Data', columns='Produto_ID', values='Quantidade Vendida', aggfunc='sum')
+        # Dias sem nenhum registro entram com venda zero, como no ajuste completo
+        diario = diario.reindex(pd.date_range(self.last_date + pd.Timedelta(days=1), diario.index.max(), freq='D'))
+        for date, vendas in diario.fillna(0).iterrows():
+            self.append_day(date, vendas)
+        self.source_version = data_version(df_vendas_estoque)
+        return True
+
+    def forecast(self, horizon=FORECAST_HORIZON):
+        """ Previsão diária (horizonte x produtos); os modelos têm previsão constante no horizonte """
+        with self._lock:
+            return np.tile(point_forecast(self.state), (horizon, 1))
+
+    def previsoes(self, horizon=FORECAST_HORIZON):
+        """ Tabela no formato do CSV 'previsoes': Data, Historico_Projecao e uma coluna por Produto_ID """
+        projecao = self.forecast(horizon)
+        with self._lock:
+            history, dates = self.history.copy(), self.dates
+        proj_dates = pd.date_range(dates[-1] + pd.Timedelta(days=1), periods=horizon, freq='D')
+        previsoes = pd.DataFrame(np.vstack([history, projecao]), columns=[str(p) for p in self.products])
+        previsoes.insert(0, 'Data', dates.append(proj_dates))
+        previsoes.insert(1, 'Historico_Projecao', ['Historico'] * len(history) + ['Projecao'] * horizon)
+        return previsoes
+
+
+_forecast_engine = None
+_forecast_engine_lock = threading.Lock()
+
+
+def get_forecast_engine(df_vendas_estoque):
+    """ Motor compartilhado entre as sessões e mantido entre as versões do histórico de vendas.
+
+    Fica fora do DATA_CACHE (TTL/LRU) para não perder os dias incorporados: quando o histórico ganha dias
+    novos, eles entram por warm start; em qualquer outra mudança o motor é reajustado.
+    """
+    global _forecast_engine
+    version = data_version(df_vendas_estoque)
+    with _forecast_engine_lock:
+        engine = _forecast_engine
+        if engine is None or (engine.source_version != version and not engine.extend(df_vendas_estoque)):
+            engine = _forecast_engine = ForecastEngine(df_vendas_estoque)
+        return engine
+
+
+def forecast_previsoes(df_vendas_estoque):
+    """ Tabela 'previsoes' gerada no app, montada uma vez por (ajuste, dias incorporados) """
+    engine = get_forecast_engine(df_vendas_estoque)
+    fit_version, revision = engine.fit_version, engine.revision
+
+    def build():
+        previsoes = engine.previsoes()
+        previsoes.attrs['versao'] = f'fc-{fit_version}-{revision}'
+        return previsoes
+
+    return DATA_CACHE.get_or_load(('previsoes_internas', fit_version, revision), build)
@@ -0,0 +1,71 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Troca separadores do padrão americano para o brasileiro em uma única passada
+_BR_SEPARATORS = str.maketrans(',.', '.,')
+
+
+@lru_cache(maxsize=65536)
+def brazilian_format(num):
+    """ Formata um número inteiro no padrão brasileiro: 1234567 -> '1.234.567' """
+    return '{:,.0f}'.format(num).translate(_BR_SEPARATORS)
+
+
+def brazilian_currency_format(num):
+    return 'R$ ' + brazilian_format(num)
+
+
+@lru_cache(maxsize=65536)
+def abbreviated_format_decimal(num):
+    """ Formata com uma casa decimal e sufixo k/M: 1234567 -> '1,2M' """
+    if num < 1_000:
+        return '{:,.1f}'.format(num).translate(_BR_SEPARATORS)
+    elif num < 1_000_000:
+        return '{:,.1f}k'.format(num / 1_000).translate(_BR_SEPARATORS)
+    else:
+        return '{:,.1f}M'.format(num / 1_000_000).translate(_BR_SEPARATORS)
+
+
+@lru_cache(maxsize=65536)
+def format_brazilian(value):
+    """ Formata um número no padrão brasileiro, equivalente a locale '%g' com agrupamento em pt_BR """
+    # Não depende de locale.setlocale, que é global ao processo e não é thread-safe
+    return format(float(value), ',g').translate(_BR_SEPARATORS)
+
+
+def _format_array(values, formatter):
+    """ Aplica `formatter` uma vez por valor distinto e espalha o resultado para o array inteiro """
+    is_series = isinstance(values, pd.Series)
+    array = np.asarray(values)
+    if array.size == 0:
+        result = np.array([], dtype=object)
+    else:
+        uniques, inverse = np.unique(array, return_inverse=True)
+        # Escalares numpy viram tipos Python para aproveitar o cache dos formatadores
+        formatted = np.array([formatter(u.item()) for u in uniques], dtype=object)
+        result = formatted[inverse.reshape(array.shape)]
+    if is_series:
+        return pd.Series(result, index=values.index, name=values.name)
+    return result
+
+
+def brazilian_format_array(values):
+    """ Versão vetorizada de brazilian_format para Series/ndarray """
+    return _format_array(values, brazilian_format)
+
+
+def brazilian_currency_format_array(values):
+    """ Versão vetorizada de brazilian_currency_format para Series/ndarray """
+    return _format_array(values, brazilian_currency_format)
+
+
+def abbreviated_format_decimal_array(values):
+    """ Versão vetorizada de abbreviated_format_decimal para Series/ndarray """
+    return _format_array(values, abbreviated_format_decimal)
+
+
+def format_brazilian_array(values):
+    """ Versão vetorizada de format_brazilian para Series/ndarray """
+    return _format_array(values, format_brazilian)
@@ -0,0 +1,328 @@
+import math
+import re
+from datetime import timedelta
+
+import pandas as pd
+import streamlit as st
+
+from data_cache import DATA_CACHE
+from dataframe import data_version
+from formatting import brazilian_format_array
+from plan_cache import normalize_intent
+from prompt_builder import normalize_text
+
+# Fração mínima do peso (IDF) da intenção que a pergunta precisa cobrir
+MIN_INTENT_SCORE = 0.6
+
+# Perguntas que pedem interpretação continuam indo para o modelo
+LLM_KEYWORDS = {'porque', 'explique', 'explica', 'analise', 'recomende', 'recomenda', 'sugira', 'compare',
+                'tendencia', 'estrategia', 'devo', 'deveria', 'impacto', 'motivo', 'causa'}
+
+CRITICIDADE_VALUES = {'alta': 'Alta', 'media': 'Media', 'baixa': 'Baixa'}
+
+MONTHS = {'janeiro': 1, 'fevereiro': 2, 'marco': 3, 'abril': 4, 'maio': 5, 'junho': 6, 'julho': 7,
+          'agosto': 8, 'setembro': 9, 'outubro': 10, 'novembro': 11, 'dezembro': 12}
+
+# Termos que só descrevem o período citado (além dos números das datas)
+PERIOD_TERMS = {'ultimo', 'ultima', 'dia', 'semana', 'mes', 'mese', 'entre', 'ate', 'periodo'} | set(MONTHS)
+
+PRODUCT_COLUMNS = ['Nome_Produto2', 'Setor', 'Classificacao ABC', 'Criticidade', 'Quantidade_Estoque_Atual',
+                   'Estoque_Minimo', 'Sugestao_Compra']
+
+
+def get_statistical_summary(df_final):
+    """ Retorna o sumário estatístico das colunas numéricas """
+    return df_final.describe()
+
+
+def get_data_type(df_final):
+    """ Retorna os tipos de dados do dataframe """
+    dtypes_df = df_final.dtypes.reset_index()
+    dtypes_df.columns = ["Coluna", "Tipo de Dado"]
+    return dtypes_df
+
+
+def get_products_below_min_stock(df_final):
+    """ Retorna os produtos com quantidade abaixo do estoque mínimo """
+    filtered_df = df_final[df_final['Quantidade_Estoque_Atual'] < df_final['Estoque_Minimo']]
+
+    # Filtrando apenas as colunas desejadas
+    filtered_df = filtered_df[['Nome_Produto2', 'Setor', 'Classificacao ABC', 'Estoque_Minimo', 'Quantidade_Estoque_Atual']]
+
+    # Aplicando a formatação brasileira nas colunas desejadas
+    filtered_df['Estoque_Minimo'] = brazilian_format_array(filtered_df['Estoque_Minimo'])
+    filtered_df['Quantidade_Estoque_Atual'] = brazilian_format_array(filtered_df['Quantidade_Estoque_Atual'])
+
+    if filtered_df.empty:  # Verifica se o DataFrame filtrado está vazio
+        return "Não há produtos com estoque abaixo do mínimo."
+    else:
+        st.write("Os produtos abaixo do estoque mínimo recomendado são:")
+        return filtered_df
+
+
+def get_abc_distribution(df_final):
+    """ Retorna a distribuição da Classificação ABC """
+    return df_final['Classificacao ABC'].value_counts()
+
+
+def get_total_purchase_suggestion(df_final):
+    """ Retorna a quantidade total sugerida para compra """
+    return df_final['Sugestao_Compra'].sum()
+
+
+def get_products_with_highest_lead_time(df_final):
+    """ Retorna os produtos com o maior lead time """
+    return df_final[df_final['Lead_Time_Dias'] == df_final['Lead_Time_Dias'].max()]
+
+
+def get_most_expensive_product(df_final):
+    """ Retorna o produto mais caro """
+    most_expensive = df_final[df_final['Custo_Unitario'] == df_final['Custo_Unitario'].max()]
+
+    # Lista para armazenar os nomes dos produtos e seus respectivos custos
+    products_list = []
+
+    # Iterando sobre as linhas do dataframe mais_expensive para construir a lista de produtos
+    for _, row in most_expensive.iterrows():
+        product_name = row['Nome_Produto2']
+        product_cost = row['Custo_Unitario']
+        products_list.append(f"'{product_name}' no Valor de R$ {product_cost:.2f}")
+
+    if not products_list:
+        return "Nenhum produto encontrado."
+
+    # Construindo a resposta final
+    if len(products_list) == 1:
+        response = f"O produto com maior valor agregado é: {products_list[0]}"
+    else:
+        products_str = ", ".join(products_list[:-1]) + " e " + products_list[-1]
+        response = f"O(s) produto(s) com maior valor agregado são: {products_str}"
+
+    return response
+
+
+def get_products(df_final):
+    """ Retorna os produtos do filtro pedido (Setor, classe ABC, criticidade) """
+    return df_final[PRODUCT_COLUMNS]
+
+
+def get_criticidade_distribution(df_final):
+    """ Retorna a quantidade de produtos por criticidade """
+    return df_final['Criticidade'].value_counts()
+
+
+def get_sales_history(df_vendas_estoque, start=None, end=None):
+    """ Retorna a quantidade vendida por produto no período, da maior para a menor """
+    data = df_vendas_estoque
+    if start is not None:
+        data = data[data['Data'] >= start]
+    if end is not None:
+        data = data[data['Data'] <= end]
+    vendas = data.groupby('Nome_Produto2', observed=True)['Quantidade Vendida'].sum()
+    if vendas.empty:
+        return "Não há vendas registradas no período."
+    return vendas.sort_values(ascending=False).reset_index()
+
+
+FUNCTIONS_DICT = {
+    "Estatísticas básicas": get_statistical_summary,
+    "Tipos de Dados": get_data_type,
+    "Quantos produtos estão abaixo do estoque mínimo recomendado?": get_products_below_min_stock,
+    "Como está a distribuição da curva ABC?": get_abc_distribution,
+    "Qual é o Total de sugestões de compra?": get_total_purchase_suggestion,
+    "Quais são os produtos com maior lead time do fornecedor?": get_products_with_highest_lead_time,
+    "Quais são os produtos com maior valor agregado?": get_most_expensive_product
+}
+
+# Intenções atendidas localmente: frases de exemplo (a pergunta canônica entra automaticamente),
+# função e dataset de origem. `needs_filter`: só responde quando a pergunta traz algum filtro.
+INTENTS = [
+    {'name': 'resumo', 'question': "Estatísticas básicas", 'function': get_statistical_summary,
+     'phrases': ["resumo estatistico", "estatisticas descritivas", "media desvio padrao"]},
+    {'name': 'tipos', 'question': "Tipos de Dados", 'function': get_data_type,
+     'phrases': ["tipo das colunas", "dtypes"]},
+    {'name': 'abaixo_minimo', 'question': "Quantos produtos estão abaixo do estoque mínimo recomendado?",
+     'function': get_products_below_min_stock,
+     'phrases': ["estoque abaixo do minimo", "produtos abaixo do minimo", "menos estoque que o minimo"]},
+    {'name': 'curva_abc', 'question': "Como está a distribuição da curva ABC?", 'function': get_abc_distribution,
+     'phrases': ["distribuicao abc", "quantos produtos por classe abc", "classificacao abc"]},
+    {'name': 'total_sugestao', 'question': "Qual é o Total de sugestões de compra?",
+     'function': get_total_purchase_suggestion,
+     'phrases': ["total sugestao compra", "quanto comprar", "soma sugestao de compra"]},
+    {'name': 'lead_time', 'question': "Quais são os produtos com maior lead time do fornecedor?",
+     'function': get_products_with_highest_lead_time,
+     'phrases': ["maior lead time", "maior prazo de entrega", "demora mais entregar"]},
+    {'name': 'mais_caro', 'question': "Quais são os produtos com maior valor agregado?",
+     'function': get_most_expensive_product,
+     'phrases': ["produto mais caro", "maior custo unitario", "maior preco"]},
+    {'name': 'criticidade', 'question': "Como está a distribuição da criticidade?",
+     'function': get_criticidade_distribution,
+     'phrases': ["quantos produtos por criticidade", "distribuicao criticidade"]},
+    {'name': 'produtos', 'question': "Quais são os produtos?", 'function': get_products, 'needs_filter': True,
+     'phrases': ["liste os produtos", "produtos do setor", "produtos da classe", "produtos de criticidade"]},
+    {'name': 'historico_vendas', 'question': "Quero ver o histórico de vendas.", 'function': get_sales_history,
+     'dataset': 'df_vendas_estoque',
+     'phrases': ["vendas por periodo", "quanto vendemos", "quantidade vendida", "vendas no periodo"]},
+]
+
+
+def _stem(token):
+    # Plural simples: 'produtos' e 'produto' caem no mesmo termo
+    return token[:-1] if len(token) > 3 and token.endswith('s') else token
+
+
+def tokenize(text):
+    return {_stem(token) for token in normalize_intent(text).split()}
+
+
+class IntentMatch:
+    def __init__(self, intent, score, filters, period):
+        self.intent = intent
+        self.score = score
+        self.filters = filters
+        self.period = period
+
+    @property
+    def description(self):
+        parts = [self.intent['question']]
+        parts += [f'{column} = {value}' for column, value in self.filters.items()]
+        if self.period:
+            parts.append(f'período: {self.period}')
+        return ' | '.join(parts)
+
+
+class IntentRouter:
+    """ Índice de palavras-chave (pesos IDF) que associa perguntas livres às funções locais """
+
+    def __init__(self, df_final, intents=INTENTS):
+        self.intents = intents
+        self._phrases = [
+            [tokenize(phrase) for phrase in [intent['question']] + intent['phrases']] for intent in intents
+        ]
+        # Frequência de cada termo entre as intenções: termos presentes em várias pesam menos
+        document_frequency = {}
+        for phrases in self._phrases:
+            for token in set().union(*phrases):
+                document_frequency[token] = document_frequency.get(token, 0) + 1
+        total = len(intents)
+        self._idf = {token: math.log(1 + total / count) for token, count in document_frequency.items()}
+        # Termos que alguma intenção conhece; os demais indicam uma pergunta que o roteador não entende
+        self._vocabulary = set(document_frequency)
+        self._setores = {normalize_text(setor).strip(): setor for setor in df_final['Setor'].dropna().unique()}
+        self._produtos = {' '.join(normalize_text(nome).split()): nome
+                          for nome in df_final['Nome_Produto2'].dropna().unique()}
+        self._produto_words = max((len(nome.split()) for nome in self._produtos), default=0)
+
+    def _extract_produto(self, text):
+        """ Nome de produto citado na pergunta (o mais longo, se houver vários), ou None """
+        words = text.split()
+        for size in range(min(self._produto_words, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                nome = self._produtos.get(' '.join(words[start:start + size]))
+                if nome is not None:
+                    return nome
+        return None
+
+    def extract_filters(self, question):
+        """ Produto, Setor, classe ABC e criticidade citados na pergunta, e os termos que os representam """
+        text = ' '.join(normalize_text(question).split())
+        filters, tokens = {}, set()
+        produto = self._extract_produto(text)
+        if produto is not None:
+            filters['Nome_Produto2'] = produto
+            tokens |= tokenize(produto)
+        for name, setor in self._setores.items():
+            if re.search(rf'\b{re.escape(name)}\b', text):
+                filters['Setor'] = setor
+                tokens |= tokenize(name)
+        found = re.search(r'\b(?:classe|curva|classificacao)(?: abc)? ([abc])\b', text)
+        if found:
+            filters['Classificacao ABC'] = found.group(1).upper()
+            tokens.add(found.group(1))
+        found = (re.search(r'\b(alta|media|baixa) criticidade\b', text)
+                 or re.search(r'\bcriticidade (alta|media|baixa)\b', text))
+        if found:
+            filters['Criticidade'] = CRITICIDADE_VALUES[found.group(1)]
+            tokens.add(found.group(1))
+        return filters, tokens
+
+    @staticmethod
+    def extract_period(question):
+        """ Período citado: 'dd/mm/aaaa a dd/mm/aaaa', 'últimos N dias/semanas/meses' ou 'mês de aaaa' """
+        dates = re.findall(r'\b(\d{1,2})/(\d{1,2})/(\d{4})\b', question)
+        if dates:
+            bounds = [pd.Timestamp(int(y), int(m), int(d)) for d, m, y in dates[:2]]
+            return (bounds[0], bounds[-1] if len(bounds) > 1 else None)
+        text = ' '.join(normalize_text(question).split())
+        found = re.search(r'\bultim[oa]s? (\d+) (dias?|semanas?|mes|meses)\b', text)
+        if found:
+            unit = {'dia': 1, 'dias': 1, 'semana': 7, 'semanas': 7, 'mes': 30, 'meses': 30}[found.group(2)]
+            days = int(found.group(1)) * unit
+            return ('ultimos', days)
+        found = re.search(rf"\b({'|'.join(MONTHS)})(?: de)? (\d{{4}})\b", text)
+        if found:
+            start = pd.Timestamp(int(found.group(2)), MONTHS[found.group(1)], 1)
+            return (start, start + pd.offsets.MonthEnd(0))
+        return None
+
+    def route(self, question):
+        """ Retorna a intenção local para a pergunta, ou None se ela deve ir para o modelo """
+        tokens = tokenize(question)
+        if not tokens or tokens & LLM_KEYWORDS or ' por que ' in f' {normalize_text(question)} ':
+            return None
+        filters, filter_tokens = self.extract_filters(question)
+        period = self.extract_period(question)
+        tokens -= filter_tokens
+        if period:
+            # Datas citadas contam como 'período' da pergunta
+            tokens = {token for token in tokens if token not in PERIOD_TERMS and not token.isdigit()}
+            tokens.add('periodo')
+        if tokens - self._vocabulary:
+            # Termos que nenhuma intenção cobre (ex.: um produto que não está no catálogo): vai para o modelo
+            return None
+
+        # Entre as frases cobertas o bastante, vence a que casou os termos mais específicos (maior peso)
+        best, best_rank = None, None
+        for intent, phrases in zip(self.intents, self._phrases):
+            if intent.get('needs_filter') and not filters:
+                continue
+            if period and intent.get('dataset') != 'df_vendas_estoque':
+                continue
+            for phrase in phrases:
+                weight = sum(self._idf[token] for token in phrase)
+                matched = sum(self._idf[token] for token in phrase & tokens)
+                if not weight or matched / weight < MIN_INTENT_SCORE:
+                    continue
+                rank = (matched, matched / weight)
+                if best_rank is None or rank > best_rank:
+                    best, best_rank = intent, rank
+        if best is None:
+            return None
+        return IntentMatch(best, best_rank[1], filters, period)
+
+    @staticmethod
+    def answer(match, df_final, df_vendas_estoque):
+        """ Executa a função da intenção sobre os dados filtrados """
+        data = df_final
+        for column, value in match.filters.items():
+            data = data[data[column] == value]
+        if match.intent.get('dataset') != 'df_vendas_estoque':
+            return match.intent['function'](data)
+
+        vendas = df_vendas_estoque
+        if match.filters:
+            vendas = vendas[vendas['Produto_ID'].isin(data['Produto_ID'])]
+        start = end = None
+        if match.period and match.period[0] == 'ultimos':
+            # Relativo à última data com dados, não ao relógio
+            end = vendas['Data'].max()
+            start = end - timedelta(days=match.period[1] - 1)
+        elif match.period:
+            start, end = match.period
+        return match.intent['function'](vendas, start, end)
+
+
+def get_intent_router(df_final):
+    """ Roteador construído uma vez por versão dos dados (os setores vêm do df_final) """
+    return DATA_CACHE.get_or_load(('intent_router', data_version(df_final)),
+                                  lambda: IntentRouter(df_final), copy=False)
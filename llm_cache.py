@@ -0,0 +1,201 @@
+import hashlib
+import threading
+import time
+from concurrent.futures import Future
+
+from decouple import config
+
+from prompt_builder import normalize_text
+from sqlite_store import DB_PATH, connect
+
+ANSWER_CACHE_TTL = config('STOCKON_ANSWER_CACHE_TTL', default=24 * 3600, cast=int)
+ANSWER_CACHE_MAX_ENTRIES = config('STOCKON_ANSWER_CACHE_MAX_ENTRIES', default=2000, cast=int)
+
+# Permite apontar o cliente para um endpoint compatível (ex.: um fake local nos testes)
+OPENAI_API_BASE = config('OPENAI_API_BASE', default='')
+
+
+def openai_module():
+    """ SDK da OpenAI importado só na primeira chamada ao modelo, já com chave e endpoint configurados """
+    import openai
+    openai.api_key = config('OPENAI_API_KEY', default='')
+    if OPENAI_API_BASE:
+        openai.api_base = OPENAI_API_BASE
+    return openai
+
+
+def normalize_question(question):
+    """ Normaliza a pergunta para que variações de caixa, acento e pontuação caiam na mesma chave """
+    return ' '.join(normalize_text(question).split())
+
+
+def answer_key(model, question, context):
+    context_hash = hashlib.sha256(str(context).encode()).hexdigest()
+    raw = '\x1f'.join([model, normalize_question(question), context_hash])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class AnswerCache:
+    """ Respostas do modelo persistidas em SQLite, com expiração (TTL) e descarte LRU """
+
+    def __init__(self, path=DB_PATH, ttl=ANSWER_CACHE_TTL, max_entries=ANSWER_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_answers (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )""")
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_answers_accessed ON llm_answers (accessed_at)')
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, count=True):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT answer FROM llm_answers WHERE key = ? AND created_at >= ?', (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                self.misses += count
+                return None
+            self._conn.execute('UPDATE llm_answers SET accessed_at = ? WHERE key = ?', (now, key))
+            self.hits += count
+            return row[0]
+
+    def put(self, key, model, question, answer):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO llm_answers VALUES (?, ?, ?, ?, ?, ?)',
+                (key, model, question, answer, now, now),
+            )
+            # Expiradas saem primeiro; depois as menos acessadas até caber no limite
+            self._conn.execute('DELETE FROM llm_answers WHERE created_at < ?', (now - self.ttl,))
+            self._conn.execute("""
+                DELETE FROM llm_answers WHERE key IN (
+                    SELECT key FROM llm_answers ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )""", (self.max_entries,))
+
+    def discard(self, key):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM llm_answers WHERE key = ?', (key,))
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM llm_answers').fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries}
+
+
+class RequestCoalescer:
+    """ Chamadas simultâneas com a mesma chave compartilham uma única execução """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.coalesced = 0
+
+    def run(self, key, func):
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def share(self, key, start):
+        """ Objeto em andamento para a chave (ex.: uma resposta em streaming) ou um novo, criado por `start()` """
+        with self._lock:
+            shared = self._in_flight.get(key)
+            if shared is None:
+                shared = self._in_flight[key] = start()
+            else:
+                self.coalesced += 1
+            return shared
+
+    def release(self, key, shared):
+        with self._lock:
+            if self._in_flight.get(key) is shared:
+                del self._in_flight[key]
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+_coalescer = RequestCoalescer()
+
+
+def get_answer_cache():
+    global _answer_cache
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            _answer_cache = AnswerCache()
+        return _answer_cache
+
+
+def chat_completion(model, messages, question, context):
+    """ Retorna o conteúdo da resposta do ChatCompletion, usando o cache persistente.
+
+    A chave é (modelo, pergunta normalizada, hash do contexto); `context` deve
+    identificar os dados enviados (ex.: versão dos dados ou o texto do contexto).
+    """
+    cache = get_answer_cache()
+    key = answer_key(model, question, context)
+    answer = cache.get(key)
+    if answer is not None:
+        return answer
+
+    def request():
+        # Outra sessão pode ter gravado a resposta enquanto esperávamos
+        cached = cache.get(key, count=False)
+        if cached is not None:
+            return cached
+        response = openai_module().ChatCompletion.create(model=model, messages=messages)
+        content = response['choices'][0]['message']['content']
+        cache.put(key, model, question, content)
+        return content
+
+    return _coalescer.run(key, request)
+
+
+def discard_answer(model, question, context):
+    """ Remove do cache uma resposta que não serviu (ex.: código recusado na validação ou com erro ao executar) """
+    get_answer_cache().discard(answer_key(model, question, context))
+
+
+def share_stream(key, start):
+    """ Stream em andamento para a chave da resposta, ou um novo criado por `start()` """
+    # Prefixo próprio: as chamadas sem streaming guardam Futures com a mesma chave
+    return _coalescer.share(('stream', key), start)
+
+
+def release_stream(key, stream):
+    """ Retira o stream da lista de chamadas em andamento (terminou ou ficou sem leitores) """
+    _coalescer.release(('stream', key), stream)
+
+
+def answer_cache_stats():
+    stats = get_answer_cache().stats()
+    stats['coalesced'] = _coalescer.coalesced
+    return stats
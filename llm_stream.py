@@ -0,0 +1,171 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from decouple import config
+
+from llm_cache import answer_key, get_answer_cache, openai_module, release_stream, share_stream
+
+LLM_WORKERS = config('STOCKON_LLM_WORKERS', default=8, cast=int)
+LLM_TIMEOUT = config('STOCKON_LLM_TIMEOUT', default=90, cast=float)
+
+# As chamadas ao modelo rodam fora da thread do script do Streamlit
+LLM_EXECUTOR = ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix='llm')
+
+
+class SharedStream:
+    """ Uma chamada ao ChatCompletion em streaming, lida por todas as sessões que fizeram a mesma pergunta.
+
+    Cada leitor acompanha a própria posição em `parts`; a chamada para quando todos os leitores cancelam.
+    """
+
+    def __init__(self, model, messages, question, key, timeout):
+        self.parts = []
+        self.error = None
+        self.finished = False
+        # Momento do último trecho recebido (ou do início da chamada): base do timeout dos leitores
+        self.last_chunk = time.monotonic()
+        self._model = model
+        self._messages = messages
+        self._question = question
+        self._key = key
+        self._timeout = timeout
+        self._condition = threading.Condition()
+        # Quem cria o stream já é o primeiro leitor
+        self._readers = 1
+        self._stopped = False
+        LLM_EXECUTOR.submit(self._run)
+
+    def attach(self):
+        """ Entra como leitor; False se a chamada já foi interrompida por falta de leitores """
+        with self._condition:
+            if self._stopped:
+                return False
+            self._readers += 1
+            return True
+
+    def detach(self):
+        with self._condition:
+            self._readers -= 1
+
+    def _run(self):
+        try:
+            response = openai_module().ChatCompletion.create(
+                model=self._model,
+                messages=self._messages,
+                stream=True,
+                request_timeout=self._timeout,
+            )
+            for chunk in response:
+                delta = chunk['choices'][0]['delta'].get('content')
+                with self._condition:
+                    self.last_chunk = time.monotonic()
+                    if not self._readers:
+                        # Todos cancelaram: a resposta incompleta não vai para o cache
+                        self._stopped = True
+                        release_stream(self._key, self)
+                        return
+                    if delta:
+                        self.parts.append(delta)
+                        self._condition.notify_all()
+            get_answer_cache().put(self._key, self._model, self._question, ''.join(self.parts))
+        except Exception as e:
+            with self._condition:
+                self.error = e
+        finally:
+            release_stream(self._key, self)
+            with self._condition:
+                self.finished = True
+                self._condition.notify_all()
+
+    def read(self, offset, timeout):
+        """ Trechos a partir de `offset`, esperando até `timeout` por novos; retorna (trechos, terminou, erro) """
+        with self._condition:
+            if len(self.parts) == offset and not self.finished:
+                self._condition.wait(timeout)
+            return self.parts[offset:], self.finished, self.error
+
+
+class StreamingAnswer:
+    """ Resposta do ChatCompletion gerada em segundo plano e consumida token a token.
+
+    Respostas já em cache são entregues de uma vez; perguntas iguais feitas ao mesmo tempo
+    compartilham a mesma chamada ao modelo, e as novas respostas são gravadas no cache ao terminar.
+    """
+
+    def __init__(self, model, messages, question, context, timeout=LLM_TIMEOUT):
+        self.model = model
+        self.question = question
+        self.text = ''
+        self.error = None
+        self.done = False
+        self._timeout = timeout
+        self._cancelled = threading.Event()
+        self._key = answer_key(model, question, context)
+        self._stream = None
+        self._offset = 0
+
+        self._cached = get_answer_cache().get(self._key)
+        if self._cached is None:
+            created = []
+
+            def start():
+                created.append(SharedStream(model, messages, question, self._key, timeout))
+                return created[0]
+
+            # Um stream sem leitores pode estar saindo da lista; nesse caso outro é criado
+            while True:
+                self._stream = share_stream(self._key, start)
+                if created or self._stream.attach():
+                    break
+
+    def cancel(self):
+        # Sai da lista de leitores uma única vez; a chamada ao modelo para quando não restar nenhum
+        if self._stream is not None and not self._cancelled.is_set() and not self.done:
+            self._stream.detach()
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def tokens(self):
+        """ Gera os trechos da resposta à medida que chegam; respeita o timeout e o cancelamento.
+
+        O timeout conta desde o último trecho recebido pelo stream e só vale enquanto ele não terminou:
+        retomar depois uma resposta já concluída entrega o restante normalmente.
+        """
+        if self._cached is not None and not self.done:
+            self.done = True
+            self.text = self._cached
+            yield self._cached
+        while not self.done:
+            if self.cancelled:
+                self.done = True
+                break
+            parts, finished, error = self._stream.read(self._offset, 0.5)
+            for part in parts:
+                # Posição avançada trecho a trecho: um rerun que interrompe a leitura retoma do ponto certo
+                self._offset += 1
+                self.text += part
+                yield part
+            if finished:
+                self.done = True
+                self.error = error
+            elif not parts and time.monotonic() - self._stream.last_chunk > self._timeout:
+                self.cancel()
+                self.done = True
+                self.error = TimeoutError('Tempo limite excedido aguardando a resposta do modelo.')
+        if self.error is not None:
+            raise self.error
+
+
+def render_stream(answer, placeholder, prefix='Resposta: '):
+    """ Escreve a resposta no placeholder conforme os tokens chegam e retorna o texto final """
+    # Ao retomar uma resposta já iniciada (ex.: após um rerun), mostra o que já chegou
+    if answer.text:
+        placeholder.markdown(prefix + answer.text + '▌')
+    for _ in answer.tokens():
+        placeholder.markdown(prefix + answer.text + '▌')
+    placeholder.markdown(prefix + answer.text)
+    return answer.text
@@ -1,31 +1,58 @@
-import streamlit as st
-from page_analytics_predict import dashboard_page
-from page_call_to_action import call_to_action_page
-# from page_metrics import metrics_page
-from page_feedback import feedback_page
-from streamlit_option_menu import option_menu
-
-def main(df_compras, df_final, df_produtos, df_vendas_estoque, previsoes, sugestoes):
-    with open("style.css") as f:
-        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
-
-    # menu dentro do sidebar
-    with st.sidebar:
-        st.image("StockON.png")
-        selected = option_menu('', ['Analytics & Predição', 'Call to Action', 'Feedback'], 
-            icons=['file-earmark-bar-graph-fill', 'graph-up-arrow', 'check2-square', 'arrow-bar-up', 'check', 'send-check-fill'], menu_icon=" ", default_index=0,
-            styles={
-                "container": {"padding": "5!important", "background-color": "#fafafa"},
-                "icon": {"color": "#009EE2", "font-size": "22px"}, 
-                "nav-link": {"font-size": "16px", "text-align": "left", "margin":"0px", "--hover-color": "#eee", "font-family": "Segoe UI, sans-serif"},
-                "nav-link-selected": {"background-color": "#333333"},
-            }
-        )
-        
-    # if selected == 'Analytics & Predição':
-    #     dashboard_page(df_compras, df_final, df_produtos, df_vendas_estoque, previsoes, sugestoes)
-    # elif selected == "Call to Action":
-    #     call_to_action_page(df_compras, df_final, df_produtos, df_vendas_estoque, previsoes, sugestoes)
-    # elif selected == 'Feedback':
-    #     feedback_page()
-
+import importlib
+import streamlit as st
+# from page_metrics import metrics_page
+from streamlit_option_menu import option_menu
+from data_cache import refresh_data, cache_stats
+from dataframe import load_datasets
+from plan_cache import plan_cache_stats
+from snapshot_store import memory_report
+
+# Páginas do menu: o módulo (e suas dependências pesadas) só é importado quando a página é escolhida,
+# e só os datasets declarados em DATASETS no módulo da página são carregados
+PAGES = {
+    'Analytics & Predição': ('page_analytics_predict', 'dashboard_page'),
+    'Call to Action': ('page_call_to_action', 'call_to_action_page'),
+    'Feedback': ('page_feedback', 'feedback_page'),
+}
+
+def load_page(name):
+    """ Retorna (função da página, datasets que ela declara), importando o módulo na primeira vez """
+    module, function = PAGES[name]
+    module = importlib.import_module(module)
+    return getattr(module, function), module.DATASETS
+
+def main():
+    with open("style.css") as f:
+        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+
+    # menu dentro do sidebar
+    with st.sidebar:
+        st.image("StockON.png")
+        selected = option_menu('', list(PAGES), 
+            icons=['file-earmark-bar-graph-fill', 'graph-up-arrow', 'check2-square', 'arrow-bar-up', 'check', 'send-check-fill'], menu_icon=" ", default_index=0,
+            styles={
+                "container": {"padding": "5!important", "background-color": "#fafafa"},
+                "icon": {"color": "#009EE2", "font-size": "22px"}, 
+                "nav-link": {"font-size": "16px", "text-align": "left", "margin":"0px", "--hover-color": "#eee", "font-family": "Segoe UI, sans-serif"},
+                "nav-link-selected": {"background-color": "#333333"},
+            }
+        )
+
+        # Descarta o cache compartilhado e recarrega os dados da origem
+        if st.button('Atualizar dados'):
+            refresh_data()
+            st.experimental_rerun()
+        stats = cache_stats()
+        st.caption(f"Cache de dados: {stats['hits']} hits / {stats['misses']} misses ({stats['entries']} em memória)")
+        plans = plan_cache_stats()
+        st.caption(f"Planos de análise: {plans['hit_rate']:.0%} reaproveitados, "
+                   f"{plans['round_trips_saved']} chamadas ao modelo evitadas")
+        # Memória dos snapshots com os tipos declarados em dataset_schema, frente aos tipos padrão do pandas
+        memory = memory_report()
+        if len(memory):
+            st.caption(f"Memória dos dados: {memory['Depois (MB)'].sum():.1f} MB "
+                       f"(sem o schema: {memory['Antes (MB)'].sum():.1f} MB)")
+        
+    page, datasets = load_page(selected)
+    page(**load_datasets(datasets))
+
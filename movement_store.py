@@ -0,0 +1,84 @@
+import threading
+import time
+
+import numpy as np
+
+from sqlite_store import DB_PATH, connect
+
+
+def receipt_movements(df_final, key_column, key, quantity):
+    """ Entradas [(Produto_ID, quantidade)] do recebimento de um item aprovado.
+
+    No produto, a entrada vai para a primeira linha (a mesma que deu a sugestão aprovada); no setor,
+    a quantidade recebida é distribuída pela sugestão de compra de cada produto.
+    """
+    rows = df_final[df_final[key_column] == key]
+    if key_column == 'Nome_Produto2':
+        return [(rows['Produto_ID'].iloc[0], quantity)] if len(rows) else []
+    sugestao = rows['Sugestao_Compra'].to_numpy(dtype=np.float64)
+    if not sugestao.sum():
+        return []
+    exatas = quantity * sugestao / sugestao.sum()
+    quantidades = np.floor(exatas)
+    # Sobras do arredondamento vão para as maiores frações, mantendo o total recebido
+    quantidades[np.argsort(quantidades - exatas)[:int(round(quantity - quantidades.sum()))]] += 1
+    return [(produto, q) for produto, q in zip(rows['Produto_ID'], quantidades) if q]
+
+
+class MovementStore:
+    """ Entradas de estoque registradas no app (recebimentos), em SQLite, somente inserções """
+
+    def __init__(self, path=DB_PATH):
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS stock_movements (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    cycle TEXT NOT NULL,
+                    item_type TEXT NOT NULL,
+                    item_key TEXT NOT NULL,
+                    produto_id TEXT NOT NULL,
+                    quantity REAL NOT NULL,
+                    user TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    UNIQUE (cycle, item_type, item_key, produto_id)
+                )""")
+
+    def record_receipt(self, cycle, item_type, item_key, user, movimentos):
+        """ Grava o recebimento do item; um segundo registro do mesmo item no ciclo é ignorado """
+        now = time.time()
+        rows = [(str(cycle), item_type, str(item_key), str(produto), float(quantity), user, now)
+                for produto, quantity in movimentos]
+        with self._lock, self._conn:
+            return self._conn.executemany("""
+                INSERT OR IGNORE INTO stock_movements
+                    (cycle, item_type, item_key, produto_id, quantity, user, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)""", rows).rowcount
+
+    def received(self, cycle, item_type):
+        """ Chaves dos itens já recebidos no ciclo """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT DISTINCT item_key FROM stock_movements WHERE cycle = ? AND item_type = ?',
+                (str(cycle), item_type)).fetchall()
+        return {item_key for item_key, in rows}
+
+    def movements(self, cycle, after_id=0):
+        """ Movimentações do ciclo posteriores a `after_id`: [(id, Produto_ID, quantidade)], em ordem """
+        with self._lock:
+            return self._conn.execute("""
+                SELECT id, produto_id, quantity FROM stock_movements
+                WHERE cycle = ? AND id > ? ORDER BY id""", (str(cycle), after_id)).fetchall()
+
+
+_movement_store = None
+_movement_store_lock = threading.Lock()
+
+
+def get_movement_store():
+    global _movement_store
+    with _movement_store_lock:
+        if _movement_store is None:
+            _movement_store = MovementStore()
+        return _movement_store
@@ -0,0 +1,115 @@
+import threading
+import time
+
+from llm_cache import normalize_question
+from sqlite_store import DB_PATH, connect
+
+# Palavras que não mudam a intenção da pergunta
+STOPWORDS = {
+    'a', 'o', 'as', 'os', 'um', 'uma', 'de', 'da', 'do', 'das', 'dos', 'e', 'em', 'no', 'na', 'nos', 'nas',
+    'por', 'para', 'com', 'que', 'qual', 'quais', 'me', 'mostre', 'mostra', 'exiba', 'liste', 'listar',
+    'quero', 'ver', 'veja', 'gostaria', 'saber', 'sao', 'esta', 'estao', 'codigo', 'obter', 'visualizar',
+    'favor', 'pode', 'poderia', 'todos', 'todas', 'meu', 'minha', 'nosso', 'nossa',
+}
+
+# Sinônimos levados a uma forma canônica
+SYNONYMS = {
+    'vendas': 'venda', 'vendido': 'venda', 'vendidos': 'venda', 'produtos': 'produto', 'itens': 'produto',
+    'item': 'produto', 'previsoes': 'previsao', 'projecao': 'previsao',
+    'estoques': 'estoque', 'compras': 'compra', 'sugestoes': 'sugestao', 'criticos': 'criticidade',
+    'critico': 'criticidade', 'fornecedores': 'fornecedor', 'setores': 'setor',
+}
+
+
+def normalize_intent(question):
+    """ Chave de intenção: pergunta normalizada, sem palavras vazias e com sinônimos, na ordem original.
+
+    A ordem é mantida: "vendas maiores que estoque" e "estoque maior que vendas" não podem compartilhar o plano.
+    """
+    tokens = []
+    for token in normalize_question(question).split():
+        token = SYNONYMS.get(token, token)
+        if token not in STOPWORDS and token not in tokens:
+            tokens.append(token)
+    return ' '.join(tokens)
+
+
+class PlanCache:
+    """ Código validado por intenção de pergunta, reaproveitado sem nova chamada ao modelo """
+
+    def __init__(self, path=DB_PATH):
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS query_plans (
+                    intent TEXT PRIMARY KEY,
+                    question TEXT NOT NULL,
+                    code TEXT NOT NULL,
+                    round_trips INTEGER NOT NULL,
+                    uses INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL
+                )""")
+            # Planos gravados com outra regra de chave (ex.: palavras ordenadas) não são reaproveitados
+            stale = [(intent,) for intent, question in self._conn.execute('SELECT intent, question FROM query_plans')
+                     if normalize_intent(question) != intent]
+            self._conn.executemany('DELETE FROM query_plans WHERE intent = ?', stale)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, question):
+        intent = normalize_intent(question)
+        with self._lock, self._conn:
+            row = self._conn.execute('SELECT code FROM query_plans WHERE intent = ?', (intent,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute('UPDATE query_plans SET uses = uses + 1, last_used_at = ? WHERE intent = ?',
+                               (time.time(), intent))
+            self.hits += 1
+            return row[0]
+
+    def put(self, question, code, round_trips):
+        """ Guarda o código aceito; `round_trips` é quantas chamadas ao modelo foram necessárias """
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO query_plans (intent, question, code, round_trips, created_at) VALUES (?, ?, ?, ?, ?)',
+                (normalize_intent(question), question, code, round_trips, time.time()),
+            )
+
+    def discard(self, question):
+        """ Remove um plano que deixou de funcionar com os dados atuais """
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM query_plans WHERE intent = ?', (normalize_intent(question),))
+
+    def stats(self):
+        with self._lock:
+            plans, uses, saved = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(uses), 0), COALESCE(SUM(uses * round_trips), 0) FROM query_plans'
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'plans': plans,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'total_reuses': uses,
+            'round_trips_saved': saved,
+        }
+
+
+_plan_cache = None
+_plan_cache_lock = threading.Lock()
+
+
+def get_plan_cache():
+    global _plan_cache
+    with _plan_cache_lock:
+        if _plan_cache is None:
+            _plan_cache = PlanCache()
+        return _plan_cache
+
+
+def plan_cache_stats():
+    return get_plan_cache().stats()
@@ -0,0 +1,190 @@
+import math
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+from decouple import config
+
+from data_cache import DATA_CACHE
+from dataframe import data_version
+from formatting import brazilian_format, brazilian_currency_format
+
+PROMPT_TOKEN_BUDGET = config('STOCKON_PROMPT_TOKEN_BUDGET', default=3000, cast=int)
+PROMPT_TOP_N = config('STOCKON_PROMPT_TOP_N', default=15, cast=int)
+
+SYSTEM_PROMPT = "Você é um analista de dados sênior. Seu interlocutor é uma pessoa de negócios que espera respostas claras, concisas e prontas para ação. Não forneça códigos ou fórmulas. Analise os dados e comunique suas descobertas de forma direta, oferecendo insights práticos baseados em dados."
+
+COLUMN_DETAILS = """Colunas de df_final (uma linha por produto):
+- 'Produto_ID', 'SKU', 'Nome_Produto2': identificação do produto.
+- 'Setor': setor do produto, como Eletrônicos, Esporte e lazer, Saúde e bem-estar, etc.
+- 'Custo_Unitario': valor de venda de cada produto.
+- 'Classificacao ABC': prioriza os produtos pela representatividade no faturamento (A, B ou C).
+- 'Quantidade_Estoque_Atual': quantidade em estoque atualmente.
+- 'Estoque_Minimo': recomendação que pondera venda histórica e projeção, lead time de recebimento da indústria e fator de criticidade (curva ABC e quantidade de fornecedores).
+- 'Criticidade' / 'Criticidade_Num': criticidade alta, média ou baixa; número maior indica maior criticidade.
+- 'Venda_ult_30d', 'Venda_ult_60', 'Venda_ult_90d': vendas nos últimos 30, 60 e 90 dias.
+- 'Lead_Time_Dias': dias que o fornecedor leva para entregar.
+- 'Sugestao_Compra': quantidade sugerida para compra."""
+
+# Coluna usada para ordenar as linhas enviadas, conforme o assunto da pergunta
+RANKING_KEYWORDS = [
+    (('lead', 'entrega', 'fornecedor'), 'Lead_Time_Dias'),
+    (('ruptura', 'cobertura', 'falta', 'perda'), 'Nivel_rup_itens'),
+    (('caro', 'custo', 'preco', 'valor'), 'Custo_Unitario'),
+    (('estoque minimo', 'minimo'), 'Estoque_Minimo'),
+    (('estoque',), 'Quantidade_Estoque_Atual'),
+    (('venda', 'vendido', 'vendas'), 'Venda_ult_30d'),
+]
+DEFAULT_RANKING = 'Sugestao_Compra'
+
+ROW_COLUMNS = ['Nome_Produto2', 'Setor', 'Classificacao ABC', 'Criticidade', 'Quantidade_Estoque_Atual',
+               'Estoque_Minimo', 'Venda_ult_30d', 'Lead_Time_Dias', 'Sugestao_Compra']
+
+
+def normalize_text(text):
+    """ Minúsculas, sem acentos e sem pontuação """
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r'[^\w\s]', ' ', text)
+
+
+def estimate_tokens(text):
+    """ Estimativa de tokens (~4 caracteres por token), sem depender do tokenizer do modelo """
+    return math.ceil(len(text) / 4)
+
+
+def _metric_lines(kpis):
+    return f"""Métricas de Ruptura Preditiva, Duração de Estoque, Ruptura Passada e Oportunidade:
+- Venda Projetada para 30 dias: {brazilian_format(kpis['Venda_proj_30d'])}
+- Estoque Atual: {brazilian_format(kpis['Estoque_Atual'])}
+- Disponibilidade de Estoque (%): {kpis['Disponibilidade_estoque']:.2f}% (estoque atual / venda projetada 30 dias)
+- Nível de Ruptura (%): {kpis['Nivel_rup_perc']:.2f}% | Nível de Ruptura (Itens): {brazilian_format(kpis['Nivel_rup_itens'])}
+- Venda Projetada por Dia: {brazilian_format(kpis['Venda_proj_dia'])}
+- Duração Estoque (em dias): {kpis['Duracao_estoque']:.1f} | Dias Sem Cobertura: {kpis['Dias_sem_cobertura']:.1f}
+- Venda Últimos 30 dias: {brazilian_format(kpis['Venda_ult_30d'])}
+- Disponibilidade de Estoque com base em Ruptura Passada: {kpis['Disp_etq_rup_pass']:.2f}%
+- Nível de Ruptura Passada (%): {kpis['Nivel_rup_perc_pass']:.1f}% | Itens: {brazilian_format(kpis['Nivel_rup_itens_pass'])}
+- Valor Médio Produto: {brazilian_currency_format(kpis['Vlr_med_produto'])}
+- Valor Venda Últimos 30 dias: {brazilian_currency_format(kpis['Vlr_venda_ult_30d'])}
+- Valor Venda Projetada para 30 dias: {brazilian_currency_format(kpis['Vlr_venda_proj_30d'])}
+- Perda em Venda Estoque Atual vs Projeção Venda: {brazilian_currency_format(kpis['perda_venda_etq_proj'])}
+- Perda em Venda Estoque Atual vs Venda passada: {brazilian_currency_format(kpis['perda_venda_etq_passado'])}"""
+
+
+def _group_lines(df_final, ruptura):
+    lines = []
+    por_abc = df_final.groupby('Classificacao ABC', observed=True).agg(
+        Produtos=('Produto_ID', 'count'), Sugestao_Compra=('Sugestao_Compra', 'sum'),
+        Estoque_Minimo=('Estoque_Minimo', 'sum'), Estoque_Atual=('Quantidade_Estoque_Atual', 'sum'))
+    lines.append('Por Classificação ABC (produtos; sugestão de compra; estoque mínimo; estoque atual):')
+    for abc, row in por_abc.iterrows():
+        lines.append(f"- {abc}: {row['Produtos']}; {brazilian_format(row['Sugestao_Compra'])}; "
+                     f"{brazilian_format(row['Estoque_Minimo'])}; {brazilian_format(row['Estoque_Atual'])}")
+
+    por_criticidade = df_final.groupby('Criticidade', observed=True).agg(
+        Produtos=('Produto_ID', 'count'), Sugestao_Compra=('Sugestao_Compra', 'sum'))
+    lines.append('Por Criticidade (produtos; sugestão de compra):')
+    for criticidade, row in por_criticidade.iterrows():
+        lines.append(f"- {criticidade}: {row['Produtos']}; {brazilian_format(row['Sugestao_Compra'])}")
+
+    lines.append('Por Setor (estoque atual; venda projetada 30d; duração do estoque em dias; perda projetada):')
+    for setor, row in ruptura.por_setor.iterrows():
+        lines.append(f"- {setor}: {brazilian_format(row['Estoque_Atual'])}; {brazilian_format(row['Venda_proj_30d'])}; "
+                     f"{row['Duracao_estoque']:.1f}; {brazilian_currency_format(row['perda_venda_etq_proj'])}")
+    return '\n'.join(lines)
+
+
+def build_static_context(df_final, ruptura):
+    """ Contexto que não depende da pergunta: descrição das colunas, agregados e métricas """
+    return f"""O dataframe df_final tem {len(df_final)} produtos, com vendas, estoques, fornecedores e sugestões de compra.
+Totais: Estoque Mínimo {brazilian_format(df_final['Estoque_Minimo'].sum())}; Sugestão de Compra {brazilian_format(df_final['Sugestao_Compra'].sum())}.
+
+{COLUMN_DETAILS}
+
+{_group_lines(df_final, ruptura)}
+
+{_metric_lines(ruptura.total)}"""
+
+
+def get_static_context(df_final, ruptura, forecast_store):
+    """ Contexto estático em cache por versão dos dados """
+    version = data_version(df_final, forecast_store)
+    return DATA_CACHE.get_or_load(('prompt_context', version), lambda: build_static_context(df_final, ruptura), copy=False)
+
+
+def _ranking_column(question):
+    for keywords, column in RANKING_KEYWORDS:
+        if any(keyword in question for keyword in keywords):
+            return column
+    return DEFAULT_RANKING
+
+
+def select_rows(df_final, ruptura, question, top_n=PROMPT_TOP_N):
+    """ Escolhe as linhas relevantes para a pergunta: filtros citados, top-N e outliers da coluna de interesse """
+    question = normalize_text(question)
+    df = df_final.join(ruptura.por_produto[['Nivel_rup_itens']], on='Produto_ID')
+
+    # Filtros por valores citados na pergunta (Setor, Criticidade, produto)
+    mask = np.ones(len(df), dtype=bool)
+    for column in ('Setor', 'Criticidade', 'Nome_Produto2'):
+        values = df[column].astype(str)
+        mentioned = [v for v in values.unique() if normalize_text(v).strip() and normalize_text(v).strip() in question]
+        if mentioned:
+            mask &= values.isin(mentioned).to_numpy()
+    abc = re.search(r'\b(?:classe|curva|classificacao|abc)\s+([abc])\b', question)
+    if abc:
+        mask &= (df['Classificacao ABC'].astype(str).str.upper() == abc.group(1).upper()).to_numpy()
+    df = df[mask]
+
+    column = _ranking_column(question)
+    ascending = any(word in question for word in ('menor', 'menores', 'baixo', 'baixa', 'menos'))
+    top = df.sort_values(column, ascending=ascending).head(top_n)
+
+    # Outliers (|z| > 3) da coluna de interesse que não entraram no top-N
+    values = df[column].astype(float)
+    std = values.std()
+    if std and not np.isnan(std):
+        outliers = df[((values - values.mean()).abs() / std > 3) & ~df.index.isin(top.index)]
+        top = pd.concat([top, outliers.head(top_n)])
+    return top, column
+
+
+def _row_lines(rows):
+    header = ' | '.join(ROW_COLUMNS)
+    lines = [header]
+    for values in rows[ROW_COLUMNS].itertuples(index=False):
+        lines.append(' | '.join(str(v) for v in values))
+    return lines
+
+
+def build_prompt(df_final, ruptura, forecast_store, question, token_budget=PROMPT_TOKEN_BUDGET,
+                 top_n=PROMPT_TOP_N):
+    """ Monta as mensagens do ChatGPT dentro do orçamento de tokens.
+
+    Retorna (messages, tokens estimados).
+    """
+    static_context = get_static_context(df_final, ruptura, forecast_store)
+    closing = f"Com base nas informações fornecidas, você perguntou: '{question}'. Vamos analisar e fornecer uma resposta."
+    used = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(static_context) + estimate_tokens(closing)
+
+    rows, column = select_rows(df_final, ruptura, question, top_n)
+    selected = []
+    if len(rows):
+        title = f"Produtos mais relevantes para a pergunta (ordenados por {column}):"
+        used += estimate_tokens(title)
+        for line in _row_lines(rows):
+            cost = estimate_tokens(line) + 1
+            if used + cost > token_budget:
+                break
+            selected.append(line)
+            used += cost
+        # Só o cabeçalho não ajuda o modelo
+        selected = [title] + selected if len(selected) > 1 else []
+
+    user_content = '\n\n'.join(part for part in (static_context, '\n'.join(selected), closing) if part)
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_content},
+    ]
+    return messages, estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(user_content)
@@ -0,0 +1,194 @@
+import glob
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from decouple import config
+
+from formatting import brazilian_currency_format, brazilian_format
+from snapshot_store import SNAPSHOT_DIR
+
+# PDFs gerados, um por tipo de report e versão dos dados
+REPORT_DIR = os.path.join(SNAPSHOT_DIR, 'reports')
+REPORT_WORKERS = config('STOCKON_REPORT_WORKERS', default=1, cast=int)
+# Versões de cada tipo de report mantidas em disco
+REPORT_KEEP = config('STOCKON_REPORT_KEEP', default=3, cast=int)
+# Produtos listados no ranking de ruptura do report
+REPORT_TOP_N = config('STOCKON_REPORT_TOP_N', default=10, cast=int)
+
+REPORT_KINDS = {
+    'resultados': 'Report de Resultados',
+    'pdca': 'Report + Sugestão PDCA',
+}
+
+
+def _mtime(path):
+    # Outro processo pode ter descartado o arquivo entre o glob e a consulta: entra como o mais antigo
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return 0
+
+
+def _latin1(text):
+    # As fontes padrão do PDF só cobrem latin-1
+    return str(text).encode('latin-1', 'replace').decode('latin-1')
+
+
+def _bar_chart(labels, values, title, color):
+    """ Gráfico de barras em PNG; usa Figure direto (sem pyplot) para poder rodar fora da thread principal """
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(7, 3), dpi=150)
+    ax = fig.subplots()
+    ax.bar([str(label) for label in labels], values, color=color)
+    ax.set_title(title, fontsize=10)
+    ax.tick_params(axis='x', labelsize=7, rotation=30)
+    ax.tick_params(axis='y', labelsize=7)
+    ax.grid(axis='y', alpha=0.3)
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png')
+    buf.seek(0)
+    return buf
+
+
+def _pdca_lines(df_final, ruptura):
+    """ Plano PDCA a partir das métricas: setores e produtos com maior ruptura projetada """
+    por_setor = ruptura.por_setor.sort_values('Nivel_rup_itens', ascending=False)
+    criticos = ruptura.por_produto[ruptura.por_produto['Nivel_rup_itens'] > 0]
+    compra = df_final['Sugestao_Compra'] * df_final['Custo_Unitario']
+    setores = ', '.join(str(s) for s in por_setor.index[:3])
+    return [
+        ('Plan', f"Priorizar os setores {setores}, com {len(criticos)} produtos com ruptura projetada "
+                 f"({brazilian_format(criticos['Nivel_rup_itens'].sum())} itens)."),
+        ('Do', f"Aprovar a sugestão de compra de {brazilian_format(df_final['Sugestao_Compra'].sum())} itens "
+               f"({brazilian_currency_format(compra.sum())}), começando pela curva A."),
+        ('Check', f"Acompanhar a disponibilidade de estoque (hoje "
+                  f"{ruptura.total['Disponibilidade_estoque']:.1f}%) e a duração do estoque "
+                  f"({ruptura.total['Duracao_estoque']:.1f} dias) no próximo ciclo."),
+        ('Act', "Revisar estoque mínimo e lead time dos produtos que seguirem em ruptura após o recebimento."),
+    ]
+
+
+def build_report(kind, df_final, ruptura):
+    """ Gera o PDF do report com as métricas atuais; retorna os bytes """
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font('Helvetica', 'B', 16)
+    pdf.cell(0, 10, _latin1(f'Stock ON - {REPORT_KINDS[kind]}'), new_x='LMARGIN', new_y='NEXT')
+    pdf.set_font('Helvetica', '', 9)
+    pdf.cell(0, 6, _latin1(f"Gerado em {datetime.now():%d/%m/%Y %H:%M}"), new_x='LMARGIN', new_y='NEXT')
+    pdf.ln(4)
+
+    total = ruptura.total
+    pdf.set_font('Helvetica', 'B', 12)
+    pdf.cell(0, 8, _latin1('Indicadores'), new_x='LMARGIN', new_y='NEXT')
+    pdf.set_font('Helvetica', '', 10)
+    for label, value in (
+        ('Venda projetada (30 dias)', brazilian_format(total['Venda_proj_30d'])),
+        ('Estoque atual', brazilian_format(total['Estoque_Atual'])),
+        ('Disponibilidade de estoque', f"{total['Disponibilidade_estoque']:.1f}%"),
+        ('Nível de ruptura (itens)', brazilian_format(total['Nivel_rup_itens'])),
+        ('Duração do estoque', f"{total['Duracao_estoque']:.1f} dias"),
+        ('Perda de venda projetada', brazilian_currency_format(total['perda_venda_etq_proj'])),
+        ('Sugestão de compra (itens)', brazilian_format(df_final['Sugestao_Compra'].sum())),
+    ):
+        pdf.cell(80, 6, _latin1(label))
+        pdf.cell(0, 6, _latin1(value), new_x='LMARGIN', new_y='NEXT')
+    pdf.ln(4)
+
+    por_setor = ruptura.por_setor.sort_values('Nivel_rup_itens', ascending=False)
+    pdf.image(_bar_chart(por_setor.index, por_setor['Nivel_rup_itens'], 'Ruptura projetada por Setor (itens)',
+                         '#d62728'), w=180)
+    sugestao_abc = df_final.groupby('Classificacao ABC', observed=True)['Sugestao_Compra'].sum()
+    pdf.image(_bar_chart(sugestao_abc.index, sugestao_abc.to_numpy(), 'Sugestão de compra por Classificação ABC',
+                         '#1f77b4'), w=180)
+
+    pdf.add_page()
+    pdf.set_font('Helvetica', 'B', 12)
+    pdf.cell(0, 8, _latin1(f'Top {REPORT_TOP_N} produtos em ruptura projetada'), new_x='LMARGIN', new_y='NEXT')
+    top = ruptura.por_produto.sort_values('Nivel_rup_itens', ascending=False).head(REPORT_TOP_N)
+    pdf.set_font('Helvetica', 'B', 9)
+    widths = (80, 40, 35, 35)
+    for width, header in zip(widths, ('Produto', 'Setor', 'Ruptura (itens)', 'Perda projetada')):
+        pdf.cell(width, 6, _latin1(header), border=1)
+    pdf.ln()
+    pdf.set_font('Helvetica', '', 9)
+    for row in top.itertuples():
+        for width, value in zip(widths, (row.Nome_Produto2, row.Setor, brazilian_format(row.Nivel_rup_itens),
+                                         brazilian_currency_format(row.perda_venda_etq_proj))):
+            pdf.cell(width, 6, _latin1(value)[:45], border=1)
+        pdf.ln()
+
+    if kind == 'pdca':
+        pdf.ln(6)
+        pdf.set_font('Helvetica', 'B', 12)
+        pdf.cell(0, 8, _latin1('Sugestão PDCA'), new_x='LMARGIN', new_y='NEXT')
+        for etapa, texto in _pdca_lines(df_final, ruptura):
+            pdf.set_font('Helvetica', 'B', 10)
+            pdf.cell(20, 6, etapa)
+            pdf.set_font('Helvetica', '', 10)
+            pdf.multi_cell(0, 6, _latin1(texto), new_x='LMARGIN', new_y='NEXT')
+    return bytes(pdf.output())
+
+
+class ReportEngine:
+    """ Gera os reports em segundo plano, uma vez por tipo e versão dos dados, e os mantém em disco """
+
+    def __init__(self, workers=REPORT_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report')
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def path(self, kind, version):
+        return os.path.join(REPORT_DIR, f'{kind}-{version}.pdf')
+
+    def request(self, kind, version, builder):
+        """ Agenda a geração (se ainda não foi feita) e retorna o Future com o caminho do PDF """
+        with self._lock:
+            job = self._jobs.get((kind, version))
+            # Uma geração que falhou pode ser pedida de novo
+            if job is None or (job.done() and job.exception() is not None):
+                job = self._executor.submit(self._build, kind, version, builder)
+                self._jobs[(kind, version)] = job
+            return job
+
+    def _build(self, kind, version, builder):
+        path = self.path(kind, version)
+        if not os.path.exists(path):
+            content = builder()
+            os.makedirs(REPORT_DIR, exist_ok=True)
+            tmp = path + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(content)
+            os.replace(tmp, path)
+            # Sessões abertas podem ainda estar baixando uma versão anterior: mantém as mais recentes
+            versions = glob.glob(os.path.join(REPORT_DIR, f'{kind}-*.pdf'))
+            for old in sorted(versions, key=_mtime)[:-REPORT_KEEP]:
+                try:
+                    os.remove(old)
+                except FileNotFoundError:
+                    pass
+        with self._lock:
+            # Só a versão atual de cada tipo fica registrada (as anteriores seguem em disco até o descarte)
+            for key in [key for key in self._jobs if key[0] == kind and key[1] != version]:
+                del self._jobs[key]
+        return path
+
+
+_report_engine = None
+_report_engine_lock = threading.Lock()
+
+
+def get_report_engine():
+    global _report_engine
+    with _report_engine_lock:
+        if _report_engine is None:
+            _report_engine = ReportEngine()
+        return _report_engine
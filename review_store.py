@@ -0,0 +1,159 @@
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+from decouple import config
+
+from sqlite_store import DB_PATH, connect
+
+# Gravações acumuladas e confirmadas em lote: a cada intervalo ou ao atingir o tamanho do lote
+REVIEW_FLUSH_INTERVAL = config('STOCKON_REVIEW_FLUSH_INTERVAL', default=0.5, cast=float)
+REVIEW_FLUSH_SIZE = config('STOCKON_REVIEW_FLUSH_SIZE', default=200, cast=int)
+
+MESES = ['Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho', 'Julho', 'Agosto', 'Setembro',
+         'Outubro', 'Novembro', 'Dezembro']
+
+
+def current_user():
+    """ Usuário da sessão (e-mail no Streamlit Cloud); localmente, 'local' """
+    try:
+        return st.experimental_user.get('email') or 'local'
+    except Exception:
+        return 'local'
+
+
+class ReviewStore:
+    """ Histórico de aprovações e feedbacks em SQLite (WAL), somente inserções, com commits em lote """
+
+    def __init__(self, path=DB_PATH, flush_interval=REVIEW_FLUSH_INTERVAL, flush_size=REVIEW_FLUSH_SIZE):
+        self.flush_size = flush_size
+        self._lock = threading.Lock()
+        self._buffer = {'decisions': [], 'feedback': []}
+        self._wake = threading.Event()
+        self._conn = connect(path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS review_decisions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user TEXT NOT NULL,
+                    cycle TEXT NOT NULL,
+                    item_type TEXT NOT NULL,
+                    item_key TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    quantity REAL NOT NULL,
+                    decided_at REAL NOT NULL
+                )""")
+            self._conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_review_decisions_user_cycle
+                ON review_decisions (user, cycle, item_type, item_key)""")
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_review_decisions_item ON review_decisions (item_type, item_key)')
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_review_decisions_decided ON review_decisions (decided_at)')
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS review_cycles (
+                    cycle TEXT NOT NULL,
+                    item_type TEXT NOT NULL,
+                    recommended INTEGER NOT NULL,
+                    started_at REAL NOT NULL,
+                    PRIMARY KEY (cycle, item_type)
+                )""")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS feedback (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user TEXT NOT NULL,
+                    name TEXT,
+                    email TEXT,
+                    message TEXT,
+                    created_at REAL NOT NULL
+                )""")
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_feedback_user ON feedback (user, created_at)')
+        threading.Thread(target=self._run, args=(flush_interval,), name='review-store', daemon=True).start()
+
+    def _run(self, flush_interval):
+        while True:
+            self._wake.wait(flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _append(self, table, row):
+        with self._lock:
+            self._buffer[table].append(row)
+            full = len(self._buffer[table]) >= self.flush_size
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """ Grava o que está acumulado em uma única transação """
+        with self._lock:
+            decisions, feedback = self._buffer['decisions'], self._buffer['feedback']
+            if not decisions and not feedback:
+                return
+            self._buffer = {'decisions': [], 'feedback': []}
+            with self._conn:
+                self._conn.executemany("""
+                    INSERT INTO review_decisions (user, cycle, item_type, item_key, status, quantity, decided_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)""", decisions)
+                self._conn.executemany(
+                    'INSERT INTO feedback (user, name, email, message, created_at) VALUES (?, ?, ?, ?, ?)', feedback)
+
+    def record_decision(self, user, cycle, item_type, item_key, status, quantity):
+        self._append('decisions', (user, str(cycle), item_type, str(item_key), status, float(quantity), time.time()))
+
+    def record_feedback(self, user, name, email, message):
+        self._append('feedback', (user, name, email, message, time.time()))
+
+    def start_cycle(self, cycle, item_type, recommended):
+        """ Registra quantas ações foram recomendadas no ciclo (uma vez por ciclo e tipo) """
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR IGNORE INTO review_cycles VALUES (?, ?, ?, ?)',
+                (str(cycle), item_type, int(recommended), time.time()))
+
+    def load_decisions(self, user, cycle, item_type):
+        """ Última decisão do usuário para cada item do ciclo: {chave: (status, quantidade)} """
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT item_key, status, quantity FROM review_decisions
+                WHERE id IN (
+                    SELECT MAX(id) FROM review_decisions
+                    WHERE user = ? AND cycle = ? AND item_type = ?
+                    GROUP BY item_key
+                )
+                ORDER BY id""", (user, str(cycle), item_type)).fetchall()
+        return {item_key: (status, quantity) for item_key, status, quantity in rows}
+
+    def monthly_actions(self, approved_status):
+        """ Ações recomendadas (itens dos ciclos iniciados no mês) e realizadas (aprovações no mês) """
+        self.flush()
+        with self._lock:
+            recommended = self._conn.execute("""
+                SELECT strftime('%Y-%m', started_at, 'unixepoch', 'localtime') AS month, SUM(recommended)
+                FROM review_cycles GROUP BY month""").fetchall()
+            realized = self._conn.execute("""
+                SELECT strftime('%Y-%m', decided_at, 'unixepoch', 'localtime') AS month, COUNT(*)
+                FROM review_decisions
+                WHERE id IN (
+                    SELECT MAX(id) FROM review_decisions GROUP BY user, cycle, item_type, item_key
+                ) AND status = ?
+                GROUP BY month""", (approved_status,)).fetchall()
+        df = pd.DataFrame(recommended, columns=['month', 'Qte Ações recomendadas']).merge(
+            pd.DataFrame(realized, columns=['month', 'Qtd Ações realizadas']), on='month', how='outer')
+        df = df.fillna(0).sort_values('month')
+        df['Mês'] = [f"{MESES[int(month[5:]) - 1]}/{month[2:4]}" for month in df['month']]
+        return df[['Mês', 'Qte Ações recomendadas', 'Qtd Ações realizadas']].astype(
+            {'Qte Ações recomendadas': int, 'Qtd Ações realizadas': int})
+
+
+_review_store = None
+_review_store_lock = threading.Lock()
+
+
+def get_review_store():
+    global _review_store
+    with _review_store_lock:
+        if _review_store is None:
+            _review_store = ReviewStore()
+        return _review_store
@@ -0,0 +1,202 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dataframe import data_version
+from movement_store import get_movement_store
+
+
+def compute_kpis(Venda_proj_30d, Estoque_Atual, Venda_ult_30d, Vlr_med_produto):
+    """ Calcula as métricas de ruptura, duração e oportunidade; aceita escalares ou arrays """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Calculando as métricas de disponibilidade e ruptura
+        Disponibilidade_estoque = (Estoque_Atual / Venda_proj_30d) * 100
+        Nivel_rup_perc = ((Estoque_Atual / Venda_proj_30d - 1) * 100)*-1
+        Nivel_rup_itens = Venda_proj_30d - Estoque_Atual
+
+        # DURAÇÃO ESTOQUE (em dias) - baseado venda projetada
+        Venda_proj_dia = Venda_proj_30d / 30
+        Duracao_estoque = Estoque_Atual / Venda_proj_dia
+        Dias_sem_cobertura = 30 - Duracao_estoque
+
+        # RUPTURA BASEADA VENDA PASSADA
+        Disp_etq_rup_pass = (Estoque_Atual / Venda_ult_30d) * 100
+        Nivel_rup_perc_pass = ((Estoque_Atual / Venda_ult_30d - 1) * 100)*-1
+        Nivel_rup_itens_pass = Venda_ult_30d - Estoque_Atual
+
+    # CALCULO DE OPORTUNIDADE
+    Vlr_venda_ult_30d = Venda_ult_30d * Vlr_med_produto
+    Vlr_venda_proj_30d = Venda_proj_30d * Vlr_med_produto
+    perda_venda_etq_proj = Vlr_med_produto * Nivel_rup_itens
+    perda_venda_etq_passado = Vlr_med_produto * Nivel_rup_itens_pass
+
+    return {
+        'Venda_proj_30d': Venda_proj_30d,
+        'Estoque_Atual': Estoque_Atual,
+        'Disponibilidade_estoque': Disponibilidade_estoque,
+        'Nivel_rup_perc': Nivel_rup_perc,
+        'Nivel_rup_itens': Nivel_rup_itens,
+        'Venda_proj_dia': Venda_proj_dia,
+        'Duracao_estoque': Duracao_estoque,
+        'Dias_sem_cobertura': Dias_sem_cobertura,
+        'Venda_ult_30d': Venda_ult_30d,
+        'Disp_etq_rup_pass': Disp_etq_rup_pass,
+        'Nivel_rup_perc_pass': Nivel_rup_perc_pass,
+        'Nivel_rup_itens_pass': Nivel_rup_itens_pass,
+        'Vlr_med_produto': Vlr_med_produto,
+        'Vlr_venda_ult_30d': Vlr_venda_ult_30d,
+        'Vlr_venda_proj_30d': Vlr_venda_proj_30d,
+        'perda_venda_etq_proj': perda_venda_etq_proj,
+        'perda_venda_etq_passado': perda_venda_etq_passado,
+    }
+
+
+class RupturaResult:
+    """ Métricas de ruptura no total e quebradas por produto, Setor e Classificação ABC """
+
+    def __init__(self, total, por_produto, por_setor, por_abc):
+        self.total = total
+        self.por_produto = por_produto
+        self.por_setor = por_setor
+        self.por_abc = por_abc
+
+
+class RupturaMetricsEngine:
+    """ Insumos das métricas por produto em arrays; as quebras por produto, Setor e ABC saem em uma passada
+    e entradas de estoque recalculam só os produtos e grupos afetados """
+
+    def __init__(self, df_final, forecast_store):
+        self._lock = threading.Lock()
+        self.produtos = df_final['Produto_ID'].to_numpy()
+        self._position = {str(pid): i for i, pid in enumerate(self.produtos)}
+        self.setor = df_final['Setor'].to_numpy()
+        self.abc = df_final['Classificacao ABC'].to_numpy()
+        self.nome = df_final['Nome_Produto2'].to_numpy()
+
+        self.estoque = df_final['Quantidade_Estoque_Atual'].to_numpy(dtype=np.float64)
+        self.venda_ult_30d = df_final['Venda_ult_30d'].to_numpy(dtype=np.float64)
+        self.custo = df_final['Custo_Unitario'].to_numpy(dtype=np.float64)
+
+        # Venda projetada para 30 dias por produto, já somada no store de 'previsoes'
+        proj_por_produto = forecast_store.projection_by_product()
+        self.venda_proj_30d = np.zeros(len(self.produtos))
+        for col, total in proj_por_produto.items():
+            pos = self._position.get(str(col))
+            if pos is not None:
+                self.venda_proj_30d[pos] = total
+        # O total considera todas as colunas de 'previsoes', mesmo produtos fora de df_final
+        self._venda_proj_total = float(proj_por_produto.sum())
+        self._venda_proj_fora = self._venda_proj_total - self.venda_proj_30d.sum()
+        self._result = None
+        # Id da última movimentação gravada já aplicada (ver get_ruptura_metrics)
+        self.last_movement = 0
+
+    def _agregado(self, chave, nome):
+        base = pd.DataFrame({
+            nome: chave,
+            'Venda_proj_30d': self.venda_proj_30d,
+            'Estoque_Atual': self.estoque,
+            'Venda_ult_30d': self.venda_ult_30d,
+            'Custo_Unitario': self.custo,
+        })
+        grupos = base.groupby(nome, observed=True).agg(
+            Venda_proj_30d=('Venda_proj_30d', 'sum'),
+            Estoque_Atual=('Estoque_Atual', 'sum'),
+            Venda_ult_30d=('Venda_ult_30d', 'sum'),
+            Vlr_med_produto=('Custo_Unitario', 'mean'),
+        )
+        kpis = compute_kpis(grupos['Venda_proj_30d'], grupos['Estoque_Atual'],
+                            grupos['Venda_ult_30d'], grupos['Vlr_med_produto'])
+        return pd.DataFrame(kpis, index=grupos.index)
+
+    def result(self):
+        """ Retorna as métricas, calculadas na primeira chamada """
+        with self._lock:
+            if self._result is None:
+                total = compute_kpis(
+                    self.venda_proj_30d.sum() + self._venda_proj_fora,
+                    float(self.estoque.sum()),
+                    self.venda_ult_30d.sum(),
+                    self.custo.mean(),
+                )
+                por_produto = pd.DataFrame(
+                    compute_kpis(self.venda_proj_30d, self.estoque, self.venda_ult_30d, self.custo),
+                    index=pd.Index(self.produtos, name='Produto_ID'),
+                )
+                por_produto.insert(0, 'Nome_Produto2', self.nome)
+                por_produto.insert(1, 'Setor', self.setor)
+                por_produto.insert(2, 'Classificacao ABC', self.abc)
+                self._result = RupturaResult(
+                    total=total,
+                    por_produto=por_produto,
+                    por_setor=self._agregado(self.setor, 'Setor'),
+                    por_abc=self._agregado(self.abc, 'Classificacao ABC'),
+                )
+            return self._result
+
+
+    def apply_movements(self, movimentos):
+        """ Entradas de estoque (Series de quantidades indexada por Produto_ID); retorna quantos produtos mudaram.
+
+        As métricas já calculadas são atualizadas só nas linhas dos produtos movimentados e dos Setores e
+        classes ABC deles, a partir dos insumos guardados no próprio resultado; o resultado anterior, que
+        outras sessões podem estar lendo, não é alterado.
+        """
+        with self._lock:
+            movimentos = movimentos.groupby(level=0).sum()
+            pos = np.array([self._position.get(str(pid), -1) for pid in movimentos.index], dtype=np.int64)
+            ok = pos >= 0
+            pos, valores = pos[ok], movimentos.to_numpy(dtype=np.float64)[ok]
+            if not len(pos):
+                return 0
+            self.estoque[pos] += valores
+            if self._result is not None:
+                anterior = self._result
+                total = anterior.total
+                self._result = RupturaResult(
+                    total=compute_kpis(total['Venda_proj_30d'], total['Estoque_Atual'] + valores.sum(),
+                                       total['Venda_ult_30d'], total['Vlr_med_produto']),
+                    por_produto=_add_stock(anterior.por_produto, self.produtos[pos], valores),
+                    por_setor=_add_stock(anterior.por_setor, self.setor[pos], valores),
+                    por_abc=_add_stock(anterior.por_abc, self.abc[pos], valores),
+                )
+            return len(pos)
+
+
+def _add_stock(metricas, chaves, valores):
+    """ Cópia de `metricas` com as entradas somadas ao estoque das linhas `chaves` e só elas recalculadas """
+    unicas, grupo = np.unique(chaves, return_inverse=True)
+    linhas = metricas.index.get_indexer(unicas)
+    colunas = {column: metricas[column].to_numpy().copy() for column in metricas.columns}
+    kpis = compute_kpis(colunas['Venda_proj_30d'][linhas],
+                        colunas['Estoque_Atual'][linhas] + np.bincount(grupo, weights=valores),
+                        colunas['Venda_ult_30d'][linhas], colunas['Vlr_med_produto'][linhas])
+    for column, values in kpis.items():
+        colunas[column][linhas] = values
+    return pd.DataFrame(colunas, index=metricas.index)
+
+
+_ruptura_engine = None
+_ruptura_engine_lock = threading.Lock()
+
+
+def get_ruptura_metrics(df_final, forecast_store):
+    """ Motor de métricas compartilhado, mantido fora do DATA_CACHE para não perder as movimentações.
+
+    `df_final` é o do snapshot: o motor é refeito quando ele ou 'previsoes' mudam, e as entradas de
+    estoque gravadas no ciclo são aplicadas uma única vez, sem recalcular os demais produtos.
+    """
+    global _ruptura_engine
+    version = data_version(df_final, forecast_store)
+    with _ruptura_engine_lock:
+        engine = _ruptura_engine
+        if engine is None or engine.version != version:
+            engine = _ruptura_engine = RupturaMetricsEngine(df_final, forecast_store)
+            engine.version, engine.cycle = version, data_version(df_final)
+        rows = get_movement_store().movements(engine.cycle, engine.last_movement)
+        if rows:
+            ids, produtos, quantidades = zip(*rows)
+            engine.apply_movements(pd.Series(quantidades, index=produtos))
+            engine.last_movement = ids[-1]
+        return engine
@@ -0,0 +1,188 @@
+# Processo de trabalho do executor de código gerado pelo modelo. Só usa dependências leves
+# (pandas/numpy/pyarrow) para que os workers subam rápido; o lado Streamlit fica em code_executor.py
+import ast
+import builtins
+import contextlib
+import io
+import os
+import sys
+import sysconfig
+
+import numpy as np
+import pandas as pd
+
+from snapshot_store import read_local_snapshot
+
+try:
+    import resource
+except ImportError:  # Windows: só o timeout de parede é aplicado
+    resource = None
+
+# Módulos que o código gerado pode importar, pelo nome completo
+ALLOWED_MODULES = {
+    'pandas', 'numpy', 'numpy.random', 'numpy.linalg', 'math', 'statistics', 'datetime', 'calendar',
+    'plotly', 'plotly.express', 'plotly.graph_objects', 'matplotlib', 'matplotlib.pyplot',
+}
+
+# Eventos de auditoria recusados durante a execução: processos, rede e alterações no sistema de arquivos
+BLOCKED_EVENTS = (
+    'os.system', 'os.exec', 'os.posix_spawn', 'os.spawn', 'os.fork', 'os.forkpty', 'os.kill', 'os.killpg',
+    'subprocess.Popen', 'socket.', 'os.remove', 'os.rename', 'os.rmdir', 'os.mkdir', 'os.chmod', 'os.chown',
+    'os.truncate', 'os.link', 'os.symlink', 'os.chdir', 'os.putenv', 'os.unsetenv', 'shutil.', 'ctypes.',
+    'webbrowser.open', 'urllib.Request', 'pty.spawn',
+)
+WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_APPEND | os.O_CREAT | os.O_TRUNC
+
+SAFE_BUILTIN_NAMES = [
+    'abs', 'all', 'any', 'bool', 'dict', 'divmod', 'enumerate', 'filter', 'float', 'format', 'frozenset',
+    'int', 'isinstance', 'len', 'list', 'map', 'max', 'min', 'print', 'range', 'reversed', 'round', 'set',
+    'slice', 'sorted', 'str', 'sum', 'tuple', 'zip', 'True', 'False', 'None',
+    'Exception', 'ValueError', 'KeyError', 'IndexError', 'TypeError', 'ZeroDivisionError',
+]
+
+
+def _restricted_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level != 0 or name not in ALLOWED_MODULES:
+        raise ImportError(f"Importação de '{name}' não permitida.")
+    return builtins.__import__(name, globals, locals, fromlist, level)
+
+
+SAFE_BUILTINS = {name: getattr(builtins, name) for name in SAFE_BUILTIN_NAMES}
+SAFE_BUILTINS['__import__'] = _restricted_import
+
+
+def _address_space_bytes():
+    """ Tamanho atual do espaço de endereçamento do processo (Linux), ou None """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def _limit_memory(memory_limit_mb):
+    # Os snapshots mapeados em memória já contam no espaço de endereçamento: o limite é somado a eles
+    current = _address_space_bytes()
+    if resource is None or current is None or not memory_limit_mb:
+        return
+    limit = current + memory_limit_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _limit_cpu(cpu_seconds):
+    # RLIMIT_CPU é acumulado no processo: o limite de cada job é o uso atual + a cota
+    if resource is None or not cpu_seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (int(usage.ru_utime + usage.ru_stime) + cpu_seconds, hard))
+
+
+def _warm_up():
+    """ Importa as bibliotecas de gráfico antes do gancho de auditoria: elas leem fontes e caches na carga """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import plotly.express  # noqa: F401
+    import plotly.graph_objects  # noqa: F401
+    figure = plt.figure()
+    figure.savefig(io.BytesIO(), format='png')
+    plt.close(figure)
+    return [matplotlib.get_data_path(), matplotlib.get_cachedir()]
+
+
+def _audit_hook(allowed_roots):
+    """ Gancho que barra, em tempo de execução, o que a validação do código deixar passar """
+    roots = tuple(os.path.realpath(root) + os.sep for root in allowed_roots if root)
+
+    def hook(event, args):
+        if event.startswith(BLOCKED_EVENTS):
+            raise PermissionError(f"Operação '{event}' não permitida.")
+        if event == 'open':
+            path, mode, flags = args
+            if (isinstance(mode, str) and any(c in mode for c in 'wax+')) or (flags or 0) & WRITE_FLAGS:
+                raise PermissionError('Gravação de arquivos não permitida.')
+        elif event in ('os.listdir', 'os.scandir'):
+            path = args[0]
+        else:
+            return
+        # Descritores já abertos (int) são do próprio worker; caminhos só dentro das bibliotecas
+        if path is None or isinstance(path, int):
+            return
+        if not os.path.realpath(os.fsdecode(path)).startswith(roots):
+            raise PermissionError(f"Acesso a '{os.fsdecode(path)}' não permitido.")
+
+    return hook
+
+
+def load_datasets(names):
+    """ Lê os snapshots locais uma vez por worker (cada worker mantém sua própria cópia em memória) """
+    datasets = {}
+    for name in names:
+        df = read_local_snapshot(name)
+        if df is None:
+            continue
+        if name == 'df_final':
+            df['Valor_Total_Compra'] = df['Custo_Unitario'] * df['Sugestao_Compra']
+        datasets[name] = df
+    return datasets
+
+
+def execute(code, datasets):
+    """ Executa o código e retorna (resultado, saída de print).
+
+    O resultado é a variável `result`, se definida, ou o valor da última expressão.
+    """
+    tree = ast.parse(code)
+    namespace = {'__builtins__': SAFE_BUILTINS, 'pd': pd, 'np': np}
+    # Cópias completas só dos datasets citados no código: `.loc[...] =` ou `inplace=True`
+    # alteram a cópia, nunca os dados que os próximos jobs do worker vão usar
+    used = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+    namespace.update({name: df.copy(deep=True) for name, df in datasets.items() if name in used})
+
+    last_expr = None
+    if tree.body and isinstance(tree.body[-1], ast.Expr):
+        last_expr = ast.Expression(tree.body.pop().value)
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        exec(compile(tree, '<gerado>', 'exec'), namespace)
+        value = eval(compile(last_expr, '<gerado>', 'eval'), namespace) if last_expr else None
+    return namespace.get('result', value), output.getvalue()
+
+
+def serialize(result):
+    """ Converte o resultado para algo que atravessa o pipe """
+    module = type(result).__module__
+    if module.startswith('plotly'):
+        return 'plotly', result.to_json()
+    if hasattr(result, 'savefig'):
+        buffer = io.BytesIO()
+        result.savefig(buffer, format='png')
+        return 'image', buffer.getvalue()
+    return 'value', result
+
+
+def worker_main(conn, dataset_names, memory_limit_mb):
+    datasets = load_datasets(dataset_names)
+    roots = _warm_up()
+    roots += [sysconfig.get_path(name) for name in ('stdlib', 'platstdlib', 'purelib', 'platlib')]
+    _limit_memory(memory_limit_mb)
+    sys.dont_write_bytecode = True
+    # A partir daqui nada de arquivos fora das bibliotecas, processos ou rede, nem para o próprio worker
+    sys.addaudithook(_audit_hook(roots))
+    while True:
+        try:
+            code, cpu_seconds = conn.recv()
+        except EOFError:
+            break
+        _limit_cpu(cpu_seconds)
+        try:
+            result, output = execute(code, datasets)
+            kind, payload = serialize(result)
+            conn.send(('ok', kind, payload, output))
+        except MemoryError:
+            conn.send(('error', None, 'Limite de memória excedido.', ''))
+        except Exception as e:
+            conn.send(('error', None, f'{type(e).__name__}: {e}', ''))
@@ -0,0 +1,218 @@
+import hashlib
+import io
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from decouple import config
+
+from dataset_schema import SCHEMAS, apply_schema, memory_usage, schema_version
+
+# Origem padrão dos CSVs; pode ser trocada por um diretório local para rodar offline
+DEFAULT_SOURCE = 'https://raw.githubusercontent.com/TabathaLarissa/AppStockON/main'
+
+DATA_SOURCE = config('STOCKON_DATA_SOURCE', default=DEFAULT_SOURCE)
+SNAPSHOT_DIR = config('STOCKON_SNAPSHOT_DIR', default='.snapshots')
+FETCH_TIMEOUT = config('STOCKON_FETCH_TIMEOUT', default=30, cast=float)
+FETCH_RETRIES = config('STOCKON_FETCH_RETRIES', default=3, cast=int)
+FETCH_BACKOFF = config('STOCKON_FETCH_BACKOFF', default=0.5, cast=float)
+
+
+def dataset_source(name):
+    """ Retorna a origem (URL, arquivo ou diretório local) do dataset """
+    # Permite apontar um dataset específico para um arquivo, ex.: STOCKON_SOURCE_DF_FINAL=/dados/df_final.csv
+    override = config(f'STOCKON_SOURCE_{name.upper()}', default='')
+    if override:
+        return override
+    if DATA_SOURCE.startswith(('http://', 'https://')):
+        return f"{DATA_SOURCE.rstrip('/')}/{name}.csv"
+    return os.path.join(DATA_SOURCE, f'{name}.csv')
+
+
+def source_timeout(name):
+    """ Timeout da origem do dataset; STOCKON_TIMEOUT_<DATASET> sobrescreve o padrão """
+    return config(f'STOCKON_TIMEOUT_{name.upper()}', default=FETCH_TIMEOUT, cast=float)
+
+
+def _snapshot_path(name):
+    return os.path.join(SNAPSHOT_DIR, f'{name}.feather')
+
+
+def _meta_path(name):
+    return os.path.join(SNAPSHOT_DIR, f'{name}.json')
+
+
+def _read_meta(name):
+    try:
+        with open(_meta_path(name), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(name, meta):
+    tmp = _meta_path(name) + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp, _meta_path(name))
+
+
+def _fetch_url(url, meta, timeout):
+    """ GET condicional: retorna (conteúdo, validadores) ou (None, validadores) se não mudou """
+    request = urllib.request.Request(url)
+    if meta.get('etag'):
+        request.add_header('If-None-Match', meta['etag'])
+    if meta.get('last_modified'):
+        request.add_header('If-Modified-Since', meta['last_modified'])
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            content = response.read()
+            headers = response.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, {}
+        raise
+    return content, {'etag': headers.get('ETag'), 'last_modified': headers.get('Last-Modified')}
+
+
+def _fetch_file(path, meta):
+    """ Lê um CSV local apenas se mtime/tamanho mudaram desde o último snapshot """
+    stat = os.stat(path)
+    validators = {'mtime': stat.st_mtime_ns, 'size': stat.st_size}
+    if meta.get('mtime') == stat.st_mtime_ns and meta.get('size') == stat.st_size:
+        return None, validators
+    with open(path, 'rb') as f:
+        return f.read(), validators
+
+
+def _retryable(error):
+    # Erros 4xx (exceto 429) não se resolvem tentando de novo
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code == 429 or error.code >= 500
+    return True
+
+
+def fetch_source(source, meta=None, timeout=FETCH_TIMEOUT, retries=FETCH_RETRIES):
+    """ Busca a origem respeitando os validadores do snapshot anterior """
+    meta = meta or {}
+    if not source.startswith(('http://', 'https://')):
+        return _fetch_file(source, meta)
+    for attempt in range(retries + 1):
+        try:
+            return _fetch_url(source, meta, timeout)
+        except (urllib.error.URLError, OSError) as e:
+            if attempt == retries or not _retryable(e):
+                raise
+            # Backoff exponencial entre as tentativas: 0,5s, 1s, 2s...
+            time.sleep(FETCH_BACKOFF * 2 ** attempt)
+
+
+def _read_snapshot(name, meta):
+    # Feather sem compressão é lido direto do arquivo mapeado, sem buffer intermediário de leitura;
+    # to_pandas() ainda monta uma cópia completa dos dados em memória
+    table = feather.read_table(_snapshot_path(name), memory_map=True)
+    df = table.to_pandas()
+    df.attrs['versao'] = meta.get('sha256', '')[:12]
+    return df
+
+
+def _write_snapshot(name, content, parse_dates):
+    """ Grava o CSV já tipado pelo schema do dataset; retorna a memória antes e depois da tipagem """
+    df = pd.read_csv(io.BytesIO(content))
+    for col in parse_dates:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    before = memory_usage(df)
+    df = apply_schema(df, SCHEMAS.get(name, {}))
+    tmp = _snapshot_path(name) + '.tmp'
+    feather.write_feather(df, tmp, compression='uncompressed')
+    os.replace(tmp, _snapshot_path(name))
+    return {'memory_before': before, 'memory_after': memory_usage(df)}
+
+
+def store_snapshot(name, content, validators=None, parse_dates=()):
+    """ Grava o CSV `content` como snapshot tipado, regravando só se o hash mudou """
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    meta = _read_meta(name)
+    sha = hashlib.sha256(content).hexdigest()
+    if (sha != meta.get('sha256') or not os.path.exists(_snapshot_path(name))
+            or meta.get('parse_dates') != list(parse_dates) or meta.get('schema') != schema_version(name)):
+        meta.update(_write_snapshot(name, content, parse_dates))
+    meta.update(validators or {})
+    meta['sha256'] = sha
+    meta['parse_dates'] = list(parse_dates)
+    meta['schema'] = schema_version(name)
+    _write_meta(name, meta)
+    return meta
+
+
+def refresh_snapshot(name, parse_dates=(), timeout=None):
+    """ Revalida a origem e atualiza o snapshot local se ela mudou; retorna os metadados do snapshot """
+    meta = _read_meta(name)
+    has_snapshot = bool(meta) and os.path.exists(_snapshot_path(name))
+    # Se as colunas de data ou o schema mudaram, o snapshot precisa ser regravado
+    if has_snapshot and (meta.get('parse_dates') != list(parse_dates) or meta.get('schema') != schema_version(name)):
+        has_snapshot = False
+
+    if timeout is None:
+        timeout = source_timeout(name)
+    try:
+        content, validators = fetch_source(dataset_source(name), meta if has_snapshot else {}, timeout)
+    except (urllib.error.URLError, OSError):
+        # Sem acesso à origem: segue com a última cópia local, se houver
+        if has_snapshot:
+            return meta
+        raise
+
+    if content is not None:
+        meta = store_snapshot(name, content, validators, parse_dates)
+    elif validators:
+        meta.update(validators)
+        _write_meta(name, meta)
+    return meta
+
+
+def load_snapshot(name, parse_dates=(), timeout=None):
+    """ Retorna o dataset a partir do snapshot local, atualizando-o se a origem mudou """
+    return _read_snapshot(name, refresh_snapshot(name, parse_dates, timeout))
+
+
+def read_local_snapshot(name):
+    """ Lê o snapshot local sem consultar a origem; retorna None se ainda não existe """
+    meta = _read_meta(name)
+    if not meta or not os.path.exists(_snapshot_path(name)):
+        return None
+    return _read_snapshot(name, meta)
+
+
+def snapshot_version(name):
+    """ Retorna a versão (hash do conteúdo) do snapshot atual do dataset """
+    return _read_meta(name).get('sha256', '')[:12]
+
+
+def memory_report(names=tuple(SCHEMAS)):
+    """ Memória de cada dataset com os tipos padrão do pandas e com o schema declarado (MB) """
+    rows = []
+    for name in names:
+        meta = _read_meta(name)
+        if 'memory_after' in meta:
+            rows.append((name, meta['memory_before'] / 2 ** 20, meta['memory_after'] / 2 ** 20))
+    report = pd.DataFrame(rows, columns=['Dataset', 'Antes (MB)', 'Depois (MB)'])
+    report['Redução'] = 1 - report['Depois (MB)'] / report['Antes (MB)']
+    return report
+
+
+def snapshot_columns(name):
+    """ Colunas do snapshot local, lidas do esquema sem carregar os dados """
+    with pa.memory_map(_snapshot_path(name)) as source:
+        return pa.ipc.open_file(source).schema.names
+
+
+def read_snapshot_columns(name, columns):
+    """ Lê só as `columns` do snapshot local; com o arquivo mapeado, as demais colunas não são tocadas """
+    return feather.read_table(_snapshot_path(name), columns=list(columns), memory_map=True).to_pandas()
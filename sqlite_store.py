@@ -0,0 +1,18 @@
+import os
+import sqlite3
+
+from decouple import config
+
+DB_PATH = config('STOCKON_DB_PATH', default='.stockon/stockon.db')
+
+
+def connect(path=DB_PATH):
+    """ Abre uma conexão SQLite em modo WAL, compartilhável entre threads (proteja com um lock) """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    # WAL: leitores não bloqueiam o escritor; NORMAL é seguro com WAL e evita fsync a cada commit
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
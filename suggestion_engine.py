@@ -0,0 +1,190 @@
+import threading
+
+import numpy as np
+import pandas as pd
+from decouple import config
+
+from data_cache import DATA_CACHE
+from dataframe import data_version
+from movement_store import get_movement_store
+from prompt_builder import normalize_text
+
+# Peso da venda projetada (previsoes) frente à venda histórica na demanda diária
+PESO_PROJECAO = config('STOCKON_PESO_PROJECAO', default=0.5, cast=float)
+# Pesos das vendas dos últimos 30, 60 e 90 dias na demanda histórica
+PESOS_HISTORICO = np.array([0.5, 0.3, 0.2])
+# Dias de cobertura da compra, além do estoque mínimo
+COBERTURA_DIAS = config('STOCKON_COBERTURA_DIAS', default=30, cast=int)
+# Dias de segurança somados ao lead time, pela representatividade do produto
+DIAS_SEGURANCA_ABC = {'A': 7, 'B': 5, 'C': 3}
+# Multiplicador do estoque mínimo pela criticidade
+FATOR_CRITICIDADE = {'alta': 1.5, 'media': 1.25, 'baixa': 1.0}
+
+# Colunas de entrada do cálculo, por produto
+INPUT_COLUMNS = ['Quantidade_Estoque_Atual', 'Venda_ult_30d', 'Venda_ult_60', 'Venda_ult_90d', 'Lead_Time_Dias',
+                 'Classificacao ABC', 'Criticidade', 'Venda_proj_30d']
+
+
+def _dias_seguranca(abc):
+    # astype(object): com colunas categóricas, o map devolveria outra categórica
+    return pd.Series(abc).astype(object).map(DIAS_SEGURANCA_ABC).fillna(DIAS_SEGURANCA_ABC['C']).to_numpy(dtype=np.float64)
+
+
+def _fator_criticidade(criticidade):
+    criticidade = pd.Series(criticidade).astype(object)
+    # Normaliza só os valores distintos ('Média' e 'Media' caem na mesma chave)
+    fatores = {valor: FATOR_CRITICIDADE.get(normalize_text(valor).strip(), 1.0) for valor in criticidade.unique()}
+    return criticidade.map(fatores).to_numpy(dtype=np.float64)
+
+
+def compute_suggestions(estoque, venda_30d, venda_60d, venda_90d, lead_time, dias_seguranca, fator_criticidade,
+                        venda_proj_30d):
+    """ Estoque mínimo e sugestão de compra para arrays de produtos; retorna (demanda_dia, minimo, sugestao) """
+    historico = np.stack([venda_30d / 30, venda_60d / 60, venda_90d / 90])
+    demanda_historica = PESOS_HISTORICO @ historico
+    demanda_dia = PESO_PROJECAO * (venda_proj_30d / 30) + (1 - PESO_PROJECAO) * demanda_historica
+
+    # Cobre o lead time + a margem de segurança da curva ABC, ponderado pela criticidade
+    estoque_minimo = np.ceil(demanda_dia * (lead_time + dias_seguranca) * fator_criticidade)
+    # Repõe até o mínimo mais a demanda do período de cobertura
+    sugestao = np.maximum(np.ceil(estoque_minimo + demanda_dia * COBERTURA_DIAS - estoque), 0)
+    return demanda_dia, estoque_minimo, sugestao
+
+
+class SuggestionEngine:
+    """ Recalcula Estoque_Minimo e Sugestao_Compra de todos os SKUs em arrays; atualizações só recalculam os alterados """
+
+    def __init__(self, df_final, forecast_store):
+        self._lock = threading.Lock()
+        self.produtos = pd.Index(df_final['Produto_ID'].astype(str))
+        self.custo = df_final['Custo_Unitario'].to_numpy(dtype=np.float64)
+
+        self.estoque = df_final['Quantidade_Estoque_Atual'].to_numpy(dtype=np.float64).copy()
+        self.venda_30d = df_final['Venda_ult_30d'].to_numpy(dtype=np.float64).copy()
+        self.venda_60d = df_final['Venda_ult_60'].to_numpy(dtype=np.float64).copy()
+        self.venda_90d = df_final['Venda_ult_90d'].to_numpy(dtype=np.float64).copy()
+        self.lead_time = df_final['Lead_Time_Dias'].to_numpy(dtype=np.float64).copy()
+        self.dias_seguranca = _dias_seguranca(df_final['Classificacao ABC'])
+        self.fator_criticidade = _fator_criticidade(df_final['Criticidade'])
+
+        # Venda projetada para 30 dias por produto (Series indexada pelo Produto_ID em texto)
+        proj_por_produto = forecast_store.projection_by_product()
+        self.venda_proj_30d = proj_por_produto.reindex(self.produtos).fillna(0).to_numpy(dtype=np.float64)
+
+        self.demanda_dia, self.estoque_minimo, self.sugestao = self._compute(slice(None))
+        self.recomputed = len(self.produtos)
+        # Id da última movimentação gravada já aplicada (ver get_suggestion_engine)
+        self.last_movement = 0
+
+    def _compute(self, rows):
+        return compute_suggestions(
+            self.estoque[rows], self.venda_30d[rows], self.venda_60d[rows], self.venda_90d[rows],
+            self.lead_time[rows], self.dias_seguranca[rows], self.fator_criticidade[rows], self.venda_proj_30d[rows],
+        )
+
+    def _positions(self, index):
+        """ Posições dos Produto_ID no motor (produtos desconhecidos são ignorados) """
+        pos = self.produtos.get_indexer(pd.Index(index).astype(str))
+        return pos, pos >= 0
+
+    def _recompute(self, dirty):
+        """ Recalcula só as linhas marcadas; retorna quantas """
+        rows = np.flatnonzero(dirty)
+        if len(rows):
+            self.demanda_dia[rows], self.estoque_minimo[rows], self.sugestao[rows] = self._compute(rows)
+        self.recomputed = len(rows)
+        return len(rows)
+
+    def update(self, changes):
+        """ Aplica novos valores de entrada (DataFrame indexado por Produto_ID, colunas de INPUT_COLUMNS) """
+        arrays = {
+            'Quantidade_Estoque_Atual': self.estoque, 'Venda_ult_30d': self.venda_30d,
+            'Venda_ult_60': self.venda_60d, 'Venda_ult_90d': self.venda_90d, 'Lead_Time_Dias': self.lead_time,
+            'Venda_proj_30d': self.venda_proj_30d,
+        }
+        with self._lock:
+            pos, ok = self._positions(changes.index)
+            pos = pos[ok]
+            dirty = np.zeros(len(self.produtos), dtype=bool)
+            for column in changes.columns:
+                if column == 'Classificacao ABC':
+                    target, novos = self.dias_seguranca, _dias_seguranca(changes[column].to_numpy()[ok])
+                elif column == 'Criticidade':
+                    target, novos = self.fator_criticidade, _fator_criticidade(changes[column].to_numpy()[ok])
+                elif column in arrays:
+                    target, novos = arrays[column], changes[column].to_numpy(dtype=np.float64)[ok]
+                else:
+                    raise KeyError(f"Coluna '{column}' não é entrada do cálculo de sugestão.")
+                # Só os SKUs cujo valor mudou de fato precisam de recálculo
+                mudou = target[pos] != novos
+                dirty[pos[mudou]] = True
+                target[pos] = novos
+            return self._recompute(dirty)
+
+    def apply_movements(self, movimentos):
+        """ Movimentações de estoque (Series de quantidades +entrada/-saída indexada por Produto_ID) """
+        with self._lock:
+            movimentos = movimentos.groupby(level=0).sum()
+            pos, ok = self._positions(movimentos.index)
+            pos, valores = pos[ok], movimentos.to_numpy(dtype=np.float64)[ok]
+            self.estoque[pos] += valores
+            dirty = np.zeros(len(self.produtos), dtype=bool)
+            dirty[pos[valores != 0]] = True
+            return self._recompute(dirty)
+
+    def result(self):
+        """ Sugestões atuais por produto, no formato das colunas de df_final """
+        with self._lock:
+            return pd.DataFrame({
+                'Produto_ID': self.produtos,
+                'Quantidade_Estoque_Atual': self.estoque.copy(),
+                'Estoque_Minimo': self.estoque_minimo.copy(),
+                'Sugestao_Compra': self.sugestao.copy(),
+                'Valor_Total_Compra': self.custo * self.sugestao,
+            })
+
+
+_suggestion_engine = None
+_suggestion_engine_lock = threading.Lock()
+
+
+def get_suggestion_engine(df_final, forecast_store):
+    """ Motor de sugestões compartilhado, mantido fora do DATA_CACHE para não perder as movimentações.
+
+    É refeito quando os dados mudam; as entradas de estoque gravadas no ciclo (versão de df_final)
+    são aplicadas uma única vez, na ordem em que foram registradas.
+    """
+    global _suggestion_engine
+    version = data_version(df_final, forecast_store)
+    with _suggestion_engine_lock:
+        engine = _suggestion_engine
+        if engine is None or engine.version != version:
+            engine = _suggestion_engine = SuggestionEngine(df_final, forecast_store)
+            engine.version, engine.cycle = version, data_version(df_final)
+        rows = get_movement_store().movements(engine.cycle, engine.last_movement)
+        if rows:
+            ids, produtos, quantidades = zip(*rows)
+            engine.apply_movements(pd.Series(quantidades, index=produtos))
+            engine.last_movement = ids[-1]
+        return engine
+
+
+def current_df_final(df_final, forecast_store):
+    """ df_final com estoque, mínimo e sugestão calculados pelo motor para todos os produtos.
+
+    Inclui as entradas de estoque registradas no ciclo; dashboard e aprovação leem os mesmos valores.
+    """
+    engine = get_suggestion_engine(df_final, forecast_store)
+    last_movement = engine.last_movement
+
+    def build():
+        atual = engine.result()
+        df = df_final.copy()
+        for column in atual.columns.drop('Produto_ID'):
+            valores = atual[column].to_numpy()
+            # Colunas inteiras do schema podem estar reduzidas (int16...): a entrada pode passar do limite
+            df[column] = valores.astype(np.int64) if pd.api.types.is_integer_dtype(df[column]) else valores
+        df.attrs['versao'] = f'{engine.version}-mov{last_movement}'
+        return df
+
+    return DATA_CACHE.get_or_load(('df_final_atual', engine.version, last_movement), build)
@@ -0,0 +1,83 @@
+import multiprocessing
+
+import pytest
+
+from code_executor import validate_generated_code
+from sandbox_worker import worker_main
+
+# Código que validava com a lista de bloqueios anterior e chegava ao sistema de arquivos
+REJECTED = [
+    """result = pd.eval('pd.io.common.os.listdir("/root")', engine='python')""",
+    """result = pd.eval('1 + 1')""",
+    """result = df_final.query("@pd.io.common.os.getcwd() == 1", engine='python')""",
+    """result = df_final.query('Sugestao_Compra > 0')""",
+    """result = pd.io.common.os.listdir('/')""",
+    """import matplotlib.pyplot as plt\nplt.imsave('/tmp/x.png', np.zeros((2, 2)))""",
+    """import matplotlib.pyplot as plt\nresult = plt.imread('/etc/passwd')""",
+    """from matplotlib.pyplot import imsave""",
+    """result = pd.ExcelFile('/tmp/x.xlsx')""",
+    """import plotly\nplotly.offline.plot({'data': []}, filename='/tmp/x.html')""",
+    """import plotly.offline""",
+    """from plotly import offline""",
+    """import plotly.express as px\nfig = px.bar(x=[1], y=[1])\nfig.write_html('/tmp/x.html')""",
+    """df_final.to_csv('/tmp/x.csv')""",
+    """result = pd.read_csv('/etc/passwd')""",
+    """result = np.load('/tmp/x.npy')""",
+    """from numpy import load""",
+    """import os""",
+    """result = df_final.plot(backend='os')""",
+    # Métodos chamados pelo nome em texto
+    """df_final.apply('to_csv', path_or_buf='/tmp/x.csv')""",
+    """df_final.agg('to_pickle', '/tmp/x.pkl')""",
+    """m = 'to' + '_csv'\ndf_final.agg(m, '/tmp/x.csv')""",
+    """for m in df_final.columns:\n    df_final.apply(m)""",
+    """def f(m):\n    return df_final.agg(m)""",
+    """result = pd.pivot_table(df_final, index='Setor', aggfunc=''.join(['to_', 'csv']))""",
+    """result = df_final.__class__""",
+    """result = '{0.__class__}'.format(df_final)""",
+    """result = getattr(df_final, 'to_csv')""",
+    """result = open('/etc/passwd').read()""",
+]
+
+ACCEPTED = [
+    """result = df_final.groupby('Setor')['Sugestao_Compra'].sum().sort_values(ascending=False).head(10)""",
+    """result = df_final[df_final['Criticidade'] == 'Alta'][['Produto_ID', 'Estoque_Atual']]""",
+    """import plotly.express as px\nresult = px.line(df_vendas_estoque, x='Data', y='Venda')""",
+    """import matplotlib.pyplot as plt\nfig, ax = plt.subplots()\nax.bar(['a', 'b'], [1, 2])\nax.set_title('Vendas')\nresult = fig""",
+    """result = df_vendas_estoque.resample('M', on='Data').agg({'Venda': 'sum', 'Estoque': 'mean'})""",
+    """result = df_final.pivot_table(index='Setor', values='Sugestao_Compra', aggfunc='sum')""",
+    """def classe(valor):\n    return 'A' if valor > 10 else 'B'\nresult = df_final['Estoque_Atual'].apply(classe)""",
+    """from datetime import timedelta\nresult = df_vendas_estoque['Data'].max() - timedelta(days=30)""",
+    """result = np.round(df_final['Custo_Unitario'].mean(), 2)""",
+]
+
+
+@pytest.mark.parametrize('code', REJECTED)
+def test_validate_generated_code_rejects(code):
+    is_valid, error_msg = validate_generated_code(code)
+    assert not is_valid
+    assert error_msg
+
+
+@pytest.mark.parametrize('code', ACCEPTED)
+def test_validate_generated_code_accepts(code):
+    assert validate_generated_code(code) == (True, None)
+
+
+def test_worker_blocks_filesystem_at_runtime(tmp_path):
+    # Mesmo sem a validação, o gancho de auditoria do worker barra leitura e gravação fora das bibliotecas
+    context = multiprocessing.get_context('spawn')
+    parent_conn, child_conn = context.Pipe()
+    process = context.Process(target=worker_main, args=(child_conn, (), 256), daemon=True)
+    process.start()
+    try:
+        for code in (f"result = pd.io.common.os.listdir({str(tmp_path)!r})",
+                     f"pd.DataFrame({{'a': [1]}}).to_csv({str(tmp_path / 'x.csv')!r})"):
+            parent_conn.send((code, 15))
+            status, _, payload, _ = parent_conn.recv()
+            assert status == 'error' and 'PermissionError' in payload
+        parent_conn.send(("result = pd.DataFrame({'a': [1, 2]})['a'].sum()", 15))
+        assert parent_conn.recv()[:3] == ('ok', 'value', 3)
+    finally:
+        process.kill()
+    assert not list(tmp_path.iterdir())